@@ -40,6 +40,28 @@ class Agent(object):
 		self._position = None
 		self._prev_position = None	
 		self._stop_counter = 0
+		self.__seed = team.spawn_seed()
+		self.__seeder = random.Random(self.__seed)
+		self._random = random.Random(self._spawn_seed())
+		self._np_random = np.random.RandomState(self._spawn_seed())
+
+	def _spawn_seed(self):
+		'''
+			Returns the seed of a UCB created by the agent, None if the agent
+			is not seeded
+		'''
+		if self.__seed is None:
+			return None
+		return self.__seeder.randint(0, 2**32 - 1)
+
+	def _create_planner(self):
+		'''
+			Returns a planner whose solves run a fixed number of iterations
+			when the agent is seeded, and OMPL's time budget otherwise
+		'''
+		if self.__seed is None:
+			return planner.BasicPlanner(self._map_manager)
+		return planner.BasicPlanner(self._map_manager, solve_iterations=1000)
 
 	def set_percept(self, percept):
 		'''
@@ -132,7 +154,7 @@ class RandomAgent(Agent):
 		pass
 
 	def select_action(self):
-		self._action = random.choice(action.Action.all_actions)
+		self._action = self._random.choice(action.Action.all_actions)
 
 	def clear_temporary_state(self):
 		pass
@@ -171,7 +193,7 @@ class HumanRandomAgent(Agent):
 		if self._is_human:
 			self._action = action.Action.key2action[self._is_key]
 		else:
-			self._action = random.choice(action.Action.all_actions)
+			self._action = self._random.choice(action.Action.all_actions)
 
 	def clear_temporary_state(self):
 		pass
@@ -190,10 +212,10 @@ class BayesianAgent(Agent):
 
 	def __init__(self, agent_type, agent_id, team, map_manager):
 		super(BayesianAgent, self).__init__(agent_type, agent_id, team, map_manager)
-		self.__controller = controller.BayesianMobileController(map_manager, agent_type)
+		self.__controller = controller.BayesianMobileController(map_manager, agent_type, seed=self._spawn_seed())
 		self.__in_transit = False
 		self.__next_state = None
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 		self.__margin = 40
 
 	def generate_messages(self):
@@ -272,7 +294,7 @@ class BayesianAgent(Agent):
 
 		self.__controller.set_current_state(self._position, self._percept, direction_vec)
 		if self._stop_counter >= 3:
-			self._action = random.choice(action.Action.all_actions)
+			self._action = self._random.choice(action.Action.all_actions)
 		else:
 			self._action = self.__controller.infer_action()
 
@@ -304,7 +326,7 @@ class PlannerAgent(Agent):
 		super(PlannerAgent, self).__init__(agent_type, agent_id, team, map_manager)
 		self.__in_transit = False
 		self.__next_state = None
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 
 
 	def generate_messages(self):
@@ -319,7 +341,7 @@ class PlannerAgent(Agent):
 		self.__planner.plan_random_goal(start_coord)
 
 	def __select_direction(self):
-		self._action = random.choice(action.Action.all_actions)
+		self._action = self._random.choice(action.Action.all_actions)
 
 	def select_action(self):
 		# print('Current position', str(self._position))
@@ -341,7 +363,7 @@ class UCBAggressiveAgent(Agent):
 
 	def __init__(self, agent_type, agent_id, team, map_manager, num_rays, visibility_angle):
 		super(UCBAggressiveAgent, self).__init__(agent_type, agent_id, team, map_manager)
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 		self.__margin = 8
 		self.__next_state = None
 		self.__num_rows = self._map_manager.get_num_rows()
@@ -354,7 +376,7 @@ class UCBAggressiveAgent(Agent):
 		self.__visibility_angle = visibility_angle
 
 		# print('Total number of strategic points:', self.__num_strategic_points)
-		self.__macro_UCB = ucb.UCB(self.__num_strategic_points)
+		self.__macro_UCB = ucb.UCB(self.__num_strategic_points, seed=self._spawn_seed())
 		self.__macro_hider_observed = False
 
 		self.__current_st_point = None
@@ -517,7 +539,7 @@ class UCBAggressiveAgent(Agent):
 		row = cell[0]
 		col = cell[1]
 		# print('# Creating micro UCB for:', row, col)
-		self.__micro_UCB[(row, col)] = ucb.UCB(8)
+		self.__micro_UCB[(row, col)] = ucb.UCB(8, seed=self._spawn_seed())
 		factor = [-1, 0, 1]
 		act_idx = 0
 
@@ -532,13 +554,9 @@ class UCBAggressiveAgent(Agent):
 				else:
 					act = self.__micro_actions[act_idx]
 					rotn = action.ROTATION[act]
-					vpolygon = self._map_manager.get_visibility_polygon(postn, rotn, self.__num_rays, self.__visibility_angle)
 					common_cells = self._map_manager.get_nearby_visibility_cells(postn)
-					visible_cells = 0
-					for a, b in common_cells:
-						coord_obs = coord.Coord(a * self.__offset, b * self.__offset)
-						if vpolygon.is_point_inside(coord_obs):
-							visible_cells += 1
+					coords_obs = [coord.Coord(a * self.__offset, b * self.__offset) for a, b in common_cells]
+					visible_cells = sum(self._map_manager.get_visible_flags(postn, rotn, self.__num_rays, self.__visibility_angle, coords_obs))
 					if visible_cells == 0:
 						visible_cells = 1
 					avg_val = self.__max_cells_visible * 1.0/ visible_cells
@@ -556,11 +574,11 @@ class UCBAggressiveAgent(Agent):
 
 		if direction_vec == None:
 			# print('@ Direction vec is None, action chosen randomly')
-			self._action = random.choice(action.Action.all_actions)
+			self._action = self._random.choice(action.Action.all_actions)
 		else:
 			if self._stop_counter >= 3:
 				# print('@ Agent got stuck, action chosen randomly')
-				self._action = random.choice(action.Action.all_actions)
+				self._action = self._random.choice(action.Action.all_actions)
 			else:
 				self._action = self.__select_closest_action(direction_vec)
 
@@ -588,7 +606,7 @@ class UCBPassiveAgent(Agent):
 
 	def __init__(self, agent_type, agent_id, team, map_manager, macro_UCB, num_rays, visibility_angle, handicap_movement=False):
 		super(UCBPassiveAgent, self).__init__(agent_type, agent_id, team, map_manager)
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 		self.__margin = 10
 		self.__next_state = None
 		self.__handicap_movement = handicap_movement
@@ -747,7 +765,7 @@ class UCBPassiveAgent(Agent):
 
 		if direction_vec == None:
 			# print('@ Direction vec is None, action chosen randomly')
-			self._action = random.choice(action.Action.all_actions)
+			self._action = self._random.choice(action.Action.all_actions)
 			# if self._position != self.__next_state:
 				# self._action = random.choice(action.Action.all_actions)
 			# else:
@@ -755,7 +773,7 @@ class UCBPassiveAgent(Agent):
 		else:
 			if self._stop_counter >= 3:
 				# print('@ Agent got stuck, action chosen randomly')
-				self._action = random.choice(action.Action.all_actions)
+				self._action = self._random.choice(action.Action.all_actions)
 			else:
 				self._action = self.__select_closest_action(direction_vec)
 
@@ -776,7 +794,7 @@ class UCBCoverageAgent(Agent):
 
 	def __init__(self, agent_type, agent_id, team, map_manager, num_rays, visibility_angle):
 		super(UCBCoverageAgent, self).__init__(agent_type, agent_id, team, map_manager)
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 		self.__margin = 8
 		self.__next_state = None
 		
@@ -787,7 +805,7 @@ class UCBCoverageAgent(Agent):
 		self.__visibility_angle = visibility_angle
 
 		# print('Total number of strategic points:', self.__num_strategic_points)
-		self._coverage_UCB = ucb.UCB(self.__num_coverage_points)
+		self._coverage_UCB = ucb.UCB(self.__num_coverage_points, seed=self._spawn_seed())
 		self.__hider_observed = False
 
 		self._current_coverage_point = None
@@ -981,7 +999,7 @@ class UCBCoverageAgent(Agent):
 			direction_vec = self.__select_direction() 
 			if direction_vec == None:
 				# print('@ Direction vec is None, action chosen randomly')
-				self._action = random.choice(action.Action.all_actions)
+				self._action = self._random.choice(action.Action.all_actions)
 				# if self._position != self.__next_state:
 					# self._action = random.choice(action.Action.all_actions)
 				# else:
@@ -989,7 +1007,7 @@ class UCBCoverageAgent(Agent):
 			else:
 				if self._stop_counter >= 3:
 					# print('@ Agent got stuck, action chosen randomly')
-					self._action = random.choice(action.Action.all_actions)
+					self._action = self._random.choice(action.Action.all_actions)
 				else:
 					self._action = self.__select_closest_action(direction_vec)
 
@@ -1081,7 +1099,7 @@ class UCBCoverageCommunicationCommanderAgent(UCBCoverageCommanderAgent):
 		replace = False
 		if self.__num_members > self.__num_coverage_contours:
 			replace = True
-		contour_id_allotments = np.random.choice(self.__num_coverage_contours, self.__num_members, replace=replace)
+		contour_id_allotments = self._np_random.choice(self.__num_coverage_contours, self.__num_members, replace=replace)
 		contour_id_allotments = list(contour_id_allotments)
 
 		agent_id = 0
@@ -1182,7 +1200,7 @@ class OffsetAgent(Agent):
 
 	def __init__(self, agent_type, agent_id, team, map_manager):
 		super(OffsetAgent, self).__init__(agent_type, agent_id, team, map_manager)
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 		self.__margin = 8
 		
 		self.__in_scan_state = True
@@ -1290,12 +1308,12 @@ class OffsetAgent(Agent):
 
 	def __initiate_change_transit(self):
 		# Change obstacle with proability 1/4
-		chance_num = random.randint(0,3)
+		chance_num = self._random.randint(0,3)
 		print('** Change Num {}'.format(chance_num))
 		if chance_num == 0:
 			self.__change_offset_obstacle()
 		num_offset_points = self.__current_offset_obstacle.get_count_offset_points()
-		pnt_id = random.randint(0, num_offset_points-1)
+		pnt_id = self._random.randint(0, num_offset_points-1)
 		self.__current_offset_point = self.__current_offset_obstacle.get_offset_point(pnt_id)
 		self.__initiate_transit(self.__current_offset_point)
 
@@ -1329,7 +1347,7 @@ class OffsetAgent(Agent):
 		if isinstance(self.__current_offset_point, mapmanager.OffsetPointRectangle):
 			scan_action = self.__current_offset_point.get_point_action()
 		elif isinstance(self.__current_offset_point, mapmanager.OffsetPointCircle):
-			choice = random.randint(0,1)
+			choice = self._random.randint(0,1)
 			choice = 0
 			if choice == 0:
 				scan_action = self.__current_offset_point.get_point_action_clkwise()
@@ -1348,7 +1366,7 @@ class OffsetAgent(Agent):
 			direction_vec = self.__select_direction() 
 			if direction_vec == None:
 				# print('@ Direction vec is None, action chosen randomly')
-				self._action = random.choice(action.Action.all_actions)
+				self._action = self._random.choice(action.Action.all_actions)
 				# if self._position != self.__next_state:
 					# self._action = random.choice(action.Action.all_actions)
 				# else:
@@ -1356,7 +1374,7 @@ class OffsetAgent(Agent):
 			else:
 				if self._stop_counter >= 3:
 					# print('@ Agent got stuck, action chosen randomly')
-					self._action = random.choice(action.Action.all_actions)
+					self._action = self._random.choice(action.Action.all_actions)
 				else:
 					self._action = self.__select_closest_action(direction_vec)
 
@@ -1387,7 +1405,7 @@ class CoverageAgent(Agent):
 
 	def __init__(self, agent_type, agent_id, team, map_manager):
 		super(CoverageAgent, self).__init__(agent_type, agent_id, team, map_manager)
-		self.__planner = planner.BasicPlanner(self._map_manager)
+		self.__planner = self._create_planner()
 		self.__margin = 8
 		
 		self.__next_state = None
@@ -1524,7 +1542,7 @@ class CoverageAgent(Agent):
 			direction_vec = self.__select_direction() 
 			if direction_vec == None:
 				# print('@ Direction vec is None, action chosen randomly')
-				self._action = random.choice(action.Action.all_actions)
+				self._action = self._random.choice(action.Action.all_actions)
 				# if self._position != self.__next_state:
 					# self._action = random.choice(action.Action.all_actions)
 				# else:
@@ -1532,7 +1550,7 @@ class CoverageAgent(Agent):
 			else:
 				if self._stop_counter >= 3:
 					# print('@ Agent got stuck, action chosen randomly')
-					self._action = random.choice(action.Action.all_actions)
+					self._action = self._random.choice(action.Action.all_actions)
 				else:
 					self._action = self.__select_closest_action(direction_vec)
 
@@ -1628,8 +1646,8 @@ class HikerCommanderAgent(CoverageAgent):
 
 	def __inform_random_seekers(self, layer_ids, seekers):
 		for seeker_id in seekers:
-			layer_id = random.choice(layer_ids)
-			idx = random.choice(range(self.__current_component.get_num_layer_coverage_nodes(layer_id)))
+			layer_id = self._random.choice(layer_ids)
+			idx = self._random.choice(range(self.__current_component.get_num_layer_coverage_nodes(layer_id)))
 			coverage_node = self.__get_layer_coverage_node(layer_id, idx)
 			self.__inform_solo_seeker(seeker_id, coverage_node)
 
@@ -1812,7 +1830,7 @@ class TrapCommanderAgent(CoverageAgent):
 		for seeker_id in range(self._commander_id + 1, self.__num_agents):
 			node_idx = seeker_id - 1
 			if node_idx >= num_occupied:
-				node_idx = random.randint(0, num_occupied - 1)
+				node_idx = self._random.randint(0, num_occupied - 1)
 			coverage_node = occupied_nodes[node_idx]
 			self.__inform_solo_seeker(seeker_id, coverage_node)
 
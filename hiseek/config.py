@@ -1,6 +1,6 @@
 class Configuration(object):
 
-	def __init__(self, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, verbose, save_frame, hider_image, seeker_image, show_fellows, show_opponent, texture_flag, full_screen):
+	def __init__(self, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, verbose, save_frame, hider_image, seeker_image, show_fellows, show_opponent, texture_flag, full_screen, ray_engine='broadcast', visibility_mode='rays', occupancy_resolution=0, percept_mode='polygon', visibility_cache=0, mover_engine='objects', profile=False):
 		self.__fps = fps * 1.0
 		self.__velocity = velocity * 1.0
 		self.__fixed_time_quanta = fixed_time_quanta
@@ -14,6 +14,13 @@ class Configuration(object):
 		self.__show_opponent = show_opponent
 		self.__texture_flag = texture_flag
 		self.__full_screen = full_screen
+		self.__ray_engine = ray_engine
+		self.__visibility_mode = visibility_mode
+		self.__occupancy_resolution = occupancy_resolution
+		self.__percept_mode = percept_mode
+		self.__visibility_cache = visibility_cache
+		self.__mover_engine = mover_engine
+		self.__profile = profile
 
 	def get_fps(self):
 		return self.__fps
@@ -52,4 +59,25 @@ class Configuration(object):
 		return self.__texture_flag
 
 	def get_full_screen(self):
-		return self.__full_screen
\ No newline at end of file
+		return self.__full_screen
+
+	def get_ray_engine(self):
+		return self.__ray_engine
+
+	def get_visibility_mode(self):
+		return self.__visibility_mode
+
+	def get_occupancy_resolution(self):
+		return self.__occupancy_resolution
+
+	def get_percept_mode(self):
+		return self.__percept_mode
+
+	def get_visibility_cache(self):
+		return self.__visibility_cache
+
+	def get_mover_engine(self):
+		return self.__mover_engine
+
+	def get_profile(self):
+		return self.__profile
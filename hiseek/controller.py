@@ -1,5 +1,6 @@
 import random
 
+import numpy as np
 import pomegranate as pm
 
 import agent
@@ -11,9 +12,11 @@ class BayesianController(object):
 	'''
 		If sampling True, choose the action by sampling from the posterior direction distribution
 		if False, choose the action with the best posteriror probability.
+		The samples are drawn from a numpy RandomState seeded with seed.
 	'''
-	def __init__(self, map_manager, agent_type, sampling=False):
+	def __init__(self, map_manager, agent_type, sampling=False, seed=None):
 		self.__map_manager = map_manager
+		self.__np_random = np.random.RandomState(seed)
 		self.__position = None
 		self.__percept = None
 		self.__action_map = None
@@ -322,8 +325,9 @@ class BayesianController(object):
 		self.__direction_dist = pm.DiscreteDistribution(direction_dict)
 
 	def sample_action(self):
-		sampled_action = self.__direction_dist.sample()
-		return action.Action.string2action[sampled_action]
+		# Drawn from the probabilities of the distribution instead of its
+		# sample(), which uses the global numpy generator
+		return int(self.__np_random.choice(action.Action.num_actions, p=self.__direction_probs))
 	
 	def best_action(self):
 		return self.__max_prob_dir
@@ -438,22 +442,22 @@ class BayesianController(object):
 
 class BayesianCuriousController(BayesianController):
 
-	def __init__(self, map_manager, agent_type, sampling=True):
-		super(BayesianCuriousController, self).__init__(map_manager, sampling)
+	def __init__(self, map_manager, agent_type, sampling=True, seed=None):
+		super(BayesianCuriousController, self).__init__(map_manager, sampling, seed=seed)
 		self._considered['target'] = False
 		self._considered['obstruction'] = False
 
 class BayesianScaredController(BayesianController):
 
-	def __init__(self, map_manager, agent_type, sampling=True):
-		super(BayesianScaredController, self).__init__(map_manager, agent_type, sampling)
+	def __init__(self, map_manager, agent_type, sampling=True, seed=None):
+		super(BayesianScaredController, self).__init__(map_manager, agent_type, sampling, seed)
 		self._considered['target'] = False
 		self._considered['visibility'] = False
 
 class BayesianMobileController(BayesianController):
 
-	def __init__(self, map_manager, agent_type, sampling=False):
-		super(BayesianMobileController, self).__init__(map_manager, agent_type, sampling)
+	def __init__(self, map_manager, agent_type, sampling=False, seed=None):
+		super(BayesianMobileController, self).__init__(map_manager, agent_type, sampling, seed)
 		self._considered['obstruction'] = False
 		self._considered['visibility'] = False
 
@@ -25,26 +25,46 @@ class Coord(object):
 	all_actions_mapping['south_east'] = south_east
 	all_actions_mapping['south_west'] = south_west
 
+	__slots__ = ('__x', '__y', '__prev_x', '__prev_y')
+
 	def __init__(self, x, y):
 		self.__x = x
 		self.__y = y
 		self.__prev_x = None
 		self.__prev_y = None
 
+	def __getstate__(self):
+		'''
+			Same state as when the attributes were kept in a dict, so that
+			pickles of Coord and of its subclasses stay loadable both ways
+		'''
+		state = dict(getattr(self, '__dict__', {}))
+		state['_Coord__x'] = self.__x
+		state['_Coord__y'] = self.__y
+		state['_Coord__prev_x'] = self.__prev_x
+		state['_Coord__prev_y'] = self.__prev_y
+		return state
+
+	def __setstate__(self, state):
+		for name, value in state.items():
+			setattr(self, name, value)
+
 	def __str__(self):
 		coord_string = '(' + str(self.__x) + ', ' + str(self.__y) + ')'
 		return coord_string
 
 	def __eq__(self, other):
-		if isinstance(other, Coord):
-			if self.__x == other.__x and self.__y == other.__y:
-				return True
-		else:
-			return False
+		return isinstance(other, Coord) and self.__x == other.__x and self.__y == other.__y
 
 	def __ne__(self, other):
 		return not self.__eq__(other)
 
+	def __hash__(self):
+		# Hashed on the value, which set_position, revert_action and the move
+		# methods change: a Coord must not move while it is a key, get_tuple
+		# giving a snapshot to key on instead
+		return hash((self.__x, self.__y))
+
 
 	def get_x(self):
 		return self.__x
@@ -67,10 +87,23 @@ class Coord(object):
 		self.__y = self.__prev_y
 
 	def get_euclidean_distance(self, other):
-		diff_x = self.get_x() - other.get_x()
-		diff_y = self.get_y() - other.get_y()
+		diff_x = self.__x - other.get_x()
+		diff_y = self.__y - other.get_y()
 		return math.sqrt(diff_x*diff_x + diff_y*diff_y)
 
+	def get_squared_distance(self, other):
+		diff_x = self.__x - other.get_x()
+		diff_y = self.__y - other.get_y()
+		return diff_x*diff_x + diff_y*diff_y
+
+	def set_position(self, x, y):
+		'''
+			Moves the coordinate in place instead of allocating a new one
+		'''
+		self.__set_prev()
+		self.__x = x
+		self.__y = y
+
 	@staticmethod
 	def to_radians(degrees):
 		return math.pi * degrees / 180.0
@@ -0,0 +1,87 @@
+import numpy as np
+
+class EdgeBuffer(object):
+	'''
+		Edges of a list of polygons compiled into contiguous arrays.
+
+		Edge k goes from (x1[k], y1[k]) to (x2[k], y2[k]) and belongs to the
+		polygon owner[k]. The edges of polygon i are stored in order between
+		the two entries of the i-th row of the slice table.
+	'''
+
+	def __init__(self, polygons):
+		self.__num_polygons = len(polygons)
+		self.__slices = np.zeros((self.__num_polygons, 2), dtype=int)
+		segment_arrays = []
+		owners = []
+		start = 0
+		for i, polygon in enumerate(polygons):
+			segment_array = polygon.get_segment_array()
+			end = start + segment_array.shape[0]
+			self.__slices[i] = (start, end)
+			segment_arrays.append(segment_array)
+			owners.append(np.full(segment_array.shape[0], i, dtype=int))
+			start = end
+		self.__num_edges = start
+
+		if self.__num_edges != 0:
+			self.__segments = np.ascontiguousarray(np.concatenate(segment_arrays))
+			self.__owner = np.concatenate(owners)
+		else:
+			self.__segments = np.zeros((0, 4))
+			self.__owner = np.zeros(0, dtype=int)
+
+		self.__x1 = self.__segments[:, 0]
+		self.__y1 = self.__segments[:, 1]
+		self.__x2 = self.__segments[:, 2]
+		self.__y2 = self.__segments[:, 3]
+
+	def get_num_polygons(self):
+		return self.__num_polygons
+
+	def get_num_edges(self):
+		return self.__num_edges
+
+	def get_segments(self):
+		'''
+			Returns all the edges as an (E, 4) array of (x1, y1, x2, y2) rows
+		'''
+		return self.__segments
+
+	def get_x1(self):
+		return self.__x1
+
+	def get_y1(self):
+		return self.__y1
+
+	def get_x2(self):
+		return self.__x2
+
+	def get_y2(self):
+		return self.__y2
+
+	def get_owner(self):
+		return self.__owner
+
+	def get_slice(self, i):
+		'''
+			Returns the (start, end) range of the edges of the i-th polygon
+		'''
+		assert(i < self.__num_polygons)
+		return self.__slices[i][0], self.__slices[i][1]
+
+	def get_slices(self):
+		return self.__slices
+
+	def get_polygon_segments(self, i):
+		start, end = self.get_slice(i)
+		return self.__segments[start:end]
+
+	def get_segments_of(self, polygon_ids):
+		'''
+			Returns the edges of the given polygons as an (E, 4) array,
+			ordered by polygon id.
+		'''
+		mask = np.zeros(self.__num_polygons, dtype=bool)
+		mask[list(polygon_ids)] = True
+		return self.__segments[mask[self.__owner]]
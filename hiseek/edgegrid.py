@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+import raycaster
+
+class EdgeGrid(object):
+	'''
+		Uniform grid over the map in which every cell lists the edges
+		passing through it.
+
+		Rays walk the grid cell by cell (Amanatides and Woo) and stop at the
+		first cell in which they hit an edge, so the cost of a ray only
+		depends on the edges near its path.
+	'''
+
+	def __init__(self, edge_buffer, width, height, cell_size):
+		self.__cell_size = float(cell_size)
+		self.__num_cols = max(1, int(math.ceil(width / self.__cell_size)))
+		self.__num_rows = max(1, int(math.ceil(height / self.__cell_size)))
+		num_cells = self.__num_cols * self.__num_rows
+
+		self.__x1 = edge_buffer.get_x1()
+		self.__y1 = edge_buffer.get_y1()
+		self.__x2 = edge_buffer.get_x2()
+		self.__y2 = edge_buffer.get_y2()
+
+		# Edges lying on a cell border are put in the cells on both the sides
+		epsilon = 1e-6 * self.__cell_size
+		cells = [[] for i in range(num_cells)]
+		for k in range(edge_buffer.get_num_edges()):
+			col_min = self.__to_col(min(self.__x1[k], self.__x2[k]) - epsilon)
+			col_max = self.__to_col(max(self.__x1[k], self.__x2[k]) + epsilon)
+			row_min = self.__to_row(min(self.__y1[k], self.__y2[k]) - epsilon)
+			row_max = self.__to_row(max(self.__y1[k], self.__y2[k]) + epsilon)
+			for row in range(row_min, row_max + 1):
+				for col in range(col_min, col_max + 1):
+					cells[row * self.__num_cols + col].append(k)
+
+		counts = np.array([len(cell) for cell in cells], dtype=int)
+		self.__cell_start = np.concatenate(([0], np.cumsum(counts)))
+		if self.__cell_start[-1] != 0:
+			self.__cell_edges = np.concatenate([np.array(cell, dtype=int) for cell in cells if len(cell) != 0])
+		else:
+			self.__cell_edges = np.zeros(0, dtype=int)
+
+	def __to_col(self, x):
+		return min(max(int(math.floor(x / self.__cell_size)), 0), self.__num_cols - 1)
+
+	def __to_row(self, y):
+		return min(max(int(math.floor(y / self.__cell_size)), 0), self.__num_rows - 1)
+
+	def get_cell_size(self):
+		return self.__cell_size
+
+	def get_num_cols(self):
+		return self.__num_cols
+
+	def get_num_rows(self):
+		return self.__num_rows
+
+	def get_cell_edges(self, col, row):
+		'''
+			Returns the ids of the edges passing through a cell
+		'''
+		cell = row * self.__num_cols + col
+		return self.__cell_edges[self.__cell_start[cell]:self.__cell_start[cell + 1]]
+
+	def cast_rays(self, ox, oy, dx, dy, t_limit):
+		'''
+			Casts M rays, all the rays being walked through the grid in
+			lockstep. A ray stops at its first hit or once it travels
+			further than its t_limit.
+
+			Returns the parameter of the closest hit of every ray (inf if
+			there is no hit before t_limit) and the id of the edge which was
+			hit (-1 if none).
+		'''
+		ox = np.asarray(ox, dtype=float)
+		oy = np.asarray(oy, dtype=float)
+		dx = np.asarray(dx, dtype=float)
+		dy = np.asarray(dy, dtype=float)
+		t_limit = np.asarray(t_limit, dtype=float)
+		num_rays = ox.shape[0]
+		cell_size = self.__cell_size
+
+		col = np.clip(np.floor(ox / cell_size).astype(int), 0, self.__num_cols - 1)
+		row = np.clip(np.floor(oy / cell_size).astype(int), 0, self.__num_rows - 1)
+		step_col = np.sign(dx).astype(int)
+		step_row = np.sign(dy).astype(int)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			t_delta_x = np.where(dx != 0, cell_size / np.abs(dx), np.inf)
+			t_delta_y = np.where(dy != 0, cell_size / np.abs(dy), np.inf)
+			t_max_x = np.where(dx != 0, ((col + (step_col > 0)) * cell_size - ox) / dx, np.inf)
+			t_max_y = np.where(dy != 0, ((row + (step_row > 0)) * cell_size - oy) / dy, np.inf)
+
+		best_t = np.full(num_rays, np.inf)
+		best_idxs = np.full(num_rays, -1, dtype=int)
+		active = np.arange(num_rays)
+		while active.shape[0] != 0:
+			cells = row[active] * self.__num_cols + col[active]
+			starts = self.__cell_start[cells]
+			counts = self.__cell_start[cells + 1] - starts
+			total = counts.sum()
+			if total != 0:
+				rays = np.repeat(active, counts)
+				positions = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+				edges = self.__cell_edges[np.repeat(starts, counts) + positions]
+				t = raycaster.intersect_rays_segments(ox[rays], oy[rays], dx[rays], dy[rays], self.__x1[edges], self.__y1[edges], self.__x2[edges], self.__y2[edges])
+
+				# Closest hit of every ray in its cell, lowest edge id on ties
+				order = np.lexsort((edges, t, rays))
+				first = np.ones(total, dtype=bool)
+				first[1:] = rays[order][1:] != rays[order][:-1]
+				hit_rays = rays[order][first]
+				hit_t = t[order][first]
+				hit_edges = edges[order][first]
+				better = (hit_t < best_t[hit_rays]) | ((hit_t == best_t[hit_rays]) & (hit_edges < best_idxs[hit_rays]))
+				best_t[hit_rays[better]] = hit_t[better]
+				best_idxs[hit_rays[better]] = hit_edges[better]
+
+			t_exit = np.minimum(t_max_x[active], t_max_y[active])
+			done = (best_t[active] <= t_exit) | (t_exit >= t_limit[active])
+
+			moving = active[~done]
+			along_x = t_max_x[moving] < t_max_y[moving]
+			moving_x = moving[along_x]
+			moving_y = moving[~along_x]
+			col[moving_x] += step_col[moving_x]
+			t_max_x[moving_x] += t_delta_x[moving_x]
+			row[moving_y] += step_row[moving_y]
+			t_max_y[moving_y] += t_delta_y[moving_y]
+
+			inside = (col[moving] >= 0) & (col[moving] < self.__num_cols) & (row[moving] >= 0) & (row[moving] < self.__num_rows)
+			active = moving[inside]
+
+		missed = best_t > t_limit
+		best_t[missed] = np.inf
+		best_idxs[missed] = -1
+		return best_t, best_idxs
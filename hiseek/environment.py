@@ -0,0 +1,177 @@
+import numpy as np
+
+import gamemap
+import coord
+import shapes
+import action
+import moverarrays
+import visibilitytable
+
+class Environment(object):
+	'''
+		Headless hide and seek game driven step by step by outside policies
+		instead of teams, with a reset(seed) / step(actions) interface.
+
+		The players are the hiders followed by the seekers. step takes one
+		action id per player, ST keeping a player in place, and every other
+		action moving the player in its direction. A hider seen by an active
+		seeker at the end of a step is caught and leaves the game. The game
+		is over once all the hiders are caught or after max_steps steps.
+
+		The observation is a dict of arrays allocated once and overwritten
+		by every reset and step:
+			poses: (N, 3) x, y and rotation of the players
+			active: (N,) whether the players are still in the game
+			visible: (N, N) whether player i sees player j, the opponents of
+			a hider being the seeker columns and conversely
+			raster: (N, raster_size, raster_size) whether a player sees the
+			points around it, raster[i, a, b] being the point at
+			(x + (a - raster_size/2) * raster_offset, y + (b - raster_size/2) * raster_offset)
+
+		Players detect each other according to the percept mode of the
+		configuration, as in the simulator. The raster is always read from
+		the visibility polygons of the players, whatever the percept mode,
+		so that a raster_size above 0 makes every step compute them.
+	'''
+
+	def __init__(self, map_id, num_hiders, num_seekers, conf_options, max_steps=1000, raster_size=0, raster_offset=10):
+		self.__num_hiders = num_hiders
+		self.__num_seekers = num_seekers
+		self.__num_players = num_hiders + num_seekers
+		self.__conf_options = conf_options
+		self.__fps = conf_options.get_fps()
+		self.__num_rays = conf_options.get_num_rays()
+		self.__visibility_angle = conf_options.get_visibility_angle()
+		self.__percept_mode = conf_options.get_percept_mode()
+		self.__max_steps = max_steps
+
+		self.__polygon_map = gamemap.PolygonMap(map_id, conf_options.get_ray_engine(), occupancy_resolution=conf_options.get_occupancy_resolution())
+		self.__polygon_map.set_visibility_cache(conf_options.get_visibility_cache())
+		self.__visibility_table = None
+		if self.__percept_mode == 'snapped':
+			self.__visibility_table = visibilitytable.VisibilityTable(self.__polygon_map, self.__visibility_angle)
+		self.__mover_arrays = None
+
+		n = self.__num_players
+		self.__raster_size = raster_size
+		self.__poses = np.zeros((n, 3), dtype=float)
+		self.__active = np.zeros(n, dtype=bool)
+		self.__visible = np.zeros((n, n), dtype=bool)
+		self.__raster = np.zeros((n, raster_size, raster_size), dtype=bool)
+		self.__rewards = np.zeros(n, dtype=float)
+		self.__observation = {'poses': self.__poses, 'active': self.__active, 'visible': self.__visible, 'raster': self.__raster}
+
+		# Offsets of the raster points, the first index running along x
+		grid = (np.arange(raster_size) - raster_size // 2) * float(raster_offset)
+		self.__raster_dx = np.repeat(grid, raster_size)
+		self.__raster_dy = np.tile(grid, raster_size)
+
+		self.__player_idxs = np.arange(n)
+		self.__random = None
+		self.__steps = 0
+		self.__num_caught = 0
+
+	def get_num_players(self):
+		return self.__num_players
+
+	def get_num_actions(self):
+		return action.Action.num_actions
+
+	def get_map(self):
+		return self.__polygon_map
+
+	def __get_free_positions(self, num_positions):
+		'''
+			Returns distinct random integer points of the map lying outside
+			the obstacles
+		'''
+		xs = []
+		ys = []
+		taken = set()
+		while len(xs) < num_positions:
+			cand_xs = self.__random.randint(0, self.__polygon_map.get_map_width() + 1, 4 * num_positions).astype(float)
+			cand_ys = self.__random.randint(0, self.__polygon_map.get_map_height() + 1, 4 * num_positions).astype(float)
+			collided = self.__polygon_map.check_point_collisions(cand_xs, cand_ys)
+			for x, y in zip(cand_xs[~collided].tolist(), cand_ys[~collided].tolist()):
+				if (x, y) not in taken and len(xs) < num_positions:
+					taken.add((x, y))
+					xs.append(x)
+					ys.append(y)
+		return np.array(xs), np.array(ys)
+
+	def reset(self, seed=None):
+		'''
+			Starts a new game with the players at random free positions and
+			returns the first observation
+		'''
+		self.__random = np.random.RandomState(seed)
+		self.__mover_arrays = moverarrays.MoverArrays(self.__polygon_map, self.__num_hiders, self.__num_seekers, self.__fps, self.__conf_options.get_velocity(), self.__conf_options.get_fixed_time_quanta())
+		xs, ys = self.__get_free_positions(self.__num_players)
+		self.__mover_arrays.set_position(self.__player_idxs, xs, ys)
+		self.__mover_arrays.set_motion(self.__player_idxs, True)
+		self.__steps = 0
+		self.__num_caught = 0
+		self.__observe()
+		return self.__observation
+
+	def step(self, actions):
+		'''
+			Plays one step with an action id for each player, the actions of
+			the inactive players being ignored. Returns the observation, the
+			rewards of the players, whether the game is over and a dict of
+			information on the game.
+
+			A caught hider gets a reward of -1, every seeker getting 1 for
+			each hider caught in the step.
+		'''
+		self.__mover_arrays.set_action(self.__player_idxs, np.asarray(actions, dtype=int))
+		self.__mover_arrays.update(1.0/self.__fps)
+		self.__steps += 1
+		self.__observe()
+
+		self.__rewards[:] = 0
+		seen = self.__visible[self.__num_hiders:, :self.__num_hiders].any(axis=0)
+		caught = np.nonzero(seen & self.__active[:self.__num_hiders])[0]
+		for i in caught.tolist():
+			self.__mover_arrays.set_hider_inactive(i)
+			self.__active[i] = False
+		self.__rewards[caught] = -1
+		self.__rewards[self.__num_hiders:] = caught.shape[0]
+		self.__num_caught += caught.shape[0]
+
+		done = self.__num_caught == self.__num_hiders or self.__steps >= self.__max_steps
+		info = {'steps': self.__steps, 'num_caught': self.__num_caught}
+		return self.__observation, self.__rewards, done, info
+
+	def __observe(self):
+		self.__poses[:, 0] = self.__mover_arrays.get_x(self.__player_idxs)
+		self.__poses[:, 1] = self.__mover_arrays.get_y(self.__player_idxs)
+		self.__poses[:, 2] = self.__mover_arrays.get_rotation(self.__player_idxs)
+		self.__active[:] = self.__mover_arrays.get_active()
+		self.__visible[:] = False
+		self.__raster[:] = False
+
+		idxs = np.nonzero(self.__active)[0]
+		xs = self.__poses[idxs, 0]
+		ys = self.__poses[idxs, 1]
+		positions = [coord.Coord(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+		rotations = self.__poses[idxs, 2].tolist()
+		visibility_polygons = None
+		if self.__percept_mode == 'polygon' or self.__raster_size > 0:
+			visibility_polygons = self.__polygon_map.get_visibility_polygons_batch(positions, rotations, self.__num_rays, self.__visibility_angle)
+
+		if self.__percept_mode == 'analytic':
+			visibility_matrix = self.__polygon_map.get_fields_of_view_matrix(positions, rotations, self.__visibility_angle, positions)
+		elif self.__percept_mode == 'snapped':
+			visibility_matrix = self.__visibility_table.get_visibility_matrix(positions, rotations, positions)
+		else:
+			visibility_matrix = shapes.VisibilityPolygon.get_visibility_matrix(visibility_polygons, xs, ys)
+		self.__visible[np.ix_(idxs, idxs)] = visibility_matrix
+		self.__visible[self.__player_idxs, self.__player_idxs] = False
+
+		# Each player only against its own raster points
+		if self.__raster_size > 0 and idxs.shape[0] != 0:
+			raster_xs = xs[:, None] + self.__raster_dx[None, :]
+			raster_ys = ys[:, None] + self.__raster_dy[None, :]
+			matrix = shapes.VisibilityPolygon.get_paired_visibility_matrix(visibility_polygons, raster_xs, raster_ys)
+			self.__raster[idxs] = matrix.reshape(-1, self.__raster_size, self.__raster_size)
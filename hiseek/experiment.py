@@ -1,17 +1,50 @@
 import os
+import multiprocessing
 
 import simulator
+import vecsimulator
+import mapmanager
+import planner
+import visibilitytable
 import statistic
 import replay
 # import test
 
+# Maps of the worker process, shared by all the runs it plays
+_worker_polygon_maps = None
+
+def init_worker(map_id, conf_options, seed=None):
+	'''
+		Loads the maps and the map files of the map managers once per
+		worker process, all the runs of the worker sharing them as the games
+		of a VecSimulator do, and seeds OMPL once for the worker
+	'''
+	global _worker_polygon_maps
+	if seed is not None:
+		planner.seed_ompl(seed)
+	_worker_polygon_maps = simulator.Simulator.create_polygon_maps(map_id, conf_options)
+	mapmanager.load_map_files(_worker_polygon_maps[0].get_map_name().split('.')[0])
+
+def run_simulation(mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, input_file, output_file, conf_options, log_flag, vis_flag, sim_turn, seed=None):
+	'''
+		Runs a single simulation and returns its number of steps, the unit
+		of work given to the processes of a parallel experiment
+	'''
+	total_step_times = []
+	sim = simulator.Simulator(mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, input_file, output_file, conf_options, log_flag, vis_flag, total_step_times, sim_turn, seed=seed, polygon_maps=_worker_polygon_maps)
+	sim.simulate()
+	return total_step_times[-1]
+
+def _run_simulation_star(sim_args):
+	return run_simulation(*sim_args)
+
 class Experiment(object):
 	"""
 		Responsible for executing the simulations in the manner demanded by the user and 
 		tracking the statistics involved
 	"""
 
-	def __init__(self, visualisation, simulation, vis_sim, replay, num_runs, mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, input_file, output_file, conf_options):
+	def __init__(self, visualisation, simulation, vis_sim, replay, num_runs, mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, input_file, output_file, conf_options, workers=1, seed=None, games=1, replay_log=True):
 		self.__visualisation = visualisation
 		self.__simulation = simulation
 		self.__vis_sim = vis_sim
@@ -26,6 +59,10 @@ class Experiment(object):
 		self.__input_file = input_file
 		self.__output_file = output_file
 		self.__conf_options = conf_options
+		self.__workers = workers
+		self.__seed = seed
+		self.__games = games
+		self.__replay_log = replay_log
 
 		self._total_step_times = []
 
@@ -40,6 +77,9 @@ class Experiment(object):
 			else:
 				print('Replay file does not exist')
 		else:
+			# OMPL can only be seeded once per process
+			if self.__seed is not None:
+				planner.seed_ompl(self.__seed)
 			if self.__vis_sim:
 				log_flag = True
 				vis_flag = True
@@ -47,16 +87,21 @@ class Experiment(object):
 				log_flag = False
 				vis_flag = True
 			elif self.__simulation:
-				log_flag = True
+				# Without the replay the players skip their visibility
+				# polygons unless their percepts need them
+				log_flag = self.__replay_log
 				vis_flag = False
-			for i in range(self.__num_runs):
-				print()
-				print('*** New game ***',i)
-				sim = simulator.Simulator(self.__mode_hiders, self.__mode_seekers, self.__num_hiders, self.__num_seekers, self.__map_id, self.__input_file, self.__output_file, self.__conf_options, log_flag, vis_flag, self._total_step_times, i)
-				sim.simulate()
-				self.__exp_log_file = open('./experiments/'+self.__exp_log_name, 'a+')
-				self.__exp_log_file.write(str(self._total_step_times[-1])+'\n')
-				self.__exp_log_file.close()
+			if self.__games > 1 and not vis_flag:
+				self.__run_vectorized(log_flag)
+			elif self.__workers > 1 and not vis_flag:
+				self.__run_parallel(log_flag, vis_flag)
+			else:
+				for i in range(self.__num_runs):
+					print()
+					print('*** New game ***',i)
+					sim = simulator.Simulator(self.__mode_hiders, self.__mode_seekers, self.__num_hiders, self.__num_seekers, self.__map_id, self.__input_file, self.__output_file, self.__conf_options, log_flag, vis_flag, self._total_step_times, i, seed=self.__get_run_seed(i))
+					sim.simulate()
+					self.__write_exp_log(self._total_step_times[-1])
 
 			print('Step times:', self._total_step_times)
 			sum_steps = 0
@@ -65,5 +110,77 @@ class Experiment(object):
 			avg_steps = sum_steps*1.0/self.__num_runs
 			print('Average step time:', avg_steps)
 
+	def __write_exp_log(self, steps):
+		self.__exp_log_file = open('./experiments/'+self.__exp_log_name, 'a+')
+		self.__exp_log_file.write(str(steps)+'\n')
+		self.__exp_log_file.close()
+
+	def __get_run_seed(self, i):
+		'''
+			Every run has its own seed, so that any run of a seeded experiment
+			can be reproduced alone
+		'''
+		if self.__seed is None:
+			return None
+		return self.__seed + i
+
+	def __get_run_output_file(self, i):
+		return self.__output_file + '.' + str(i)
+
+	def __run_parallel(self, log_flag, vis_flag):
+		'''
+			Fans the runs out to a pool of worker processes. The step counts
+			are gathered in run order and, as in a sequential experiment, the
+			replay of the last run is the one left in the output file.
+		'''
+		print('Running', self.__num_runs, 'games on', self.__workers, 'workers')
+		all_sim_args = []
+		for i in range(self.__num_runs):
+			all_sim_args.append((self.__mode_hiders, self.__mode_seekers, self.__num_hiders, self.__num_seekers, self.__map_id, self.__input_file, self.__get_run_output_file(i), self.__conf_options, log_flag, vis_flag, i, self.__get_run_seed(i)))
+
+		# Built here so that the workers only ever read the table file
+		if self.__conf_options.get_percept_mode() == 'snapped':
+			polygon_map = simulator.Simulator.create_polygon_maps(self.__map_id, self.__conf_options)[0]
+			visibilitytable.VisibilityTable(polygon_map, self.__conf_options.get_visibility_angle())
+
+		pool = multiprocessing.Pool(self.__workers, init_worker, (self.__map_id, self.__conf_options, self.__seed))
+		try:
+			for i, steps in enumerate(pool.imap(_run_simulation_star, all_sim_args)):
+				print('*** Game over ***', i, 'steps:', steps)
+				self._total_step_times.append(steps)
+				self.__write_exp_log(steps)
+		finally:
+			pool.close()
+			pool.join()
+
+		if log_flag:
+			self.__keep_last_replay()
+
+	def __run_vectorized(self, log_flag):
+		'''
+			Plays the runs in batches of games stepped together
+		'''
+		print('Running', self.__num_runs, 'games in batches of', self.__games)
+		for start in range(0, self.__num_runs, self.__games):
+			sim_turns = list(range(start, min(start + self.__games, self.__num_runs)))
+			seeds = [self.__get_run_seed(i) for i in sim_turns]
+			output_files = None
+			if log_flag:
+				output_files = [self.__get_run_output_file(i) for i in sim_turns]
+			vec_sim = vecsimulator.VecSimulator(self.__mode_hiders, self.__mode_seekers, self.__num_hiders, self.__num_seekers, self.__map_id, self.__conf_options, sim_turns, seeds, output_files)
+			for i, steps in zip(sim_turns, vec_sim.simulate()):
+				print('*** Game over ***', i, 'steps:', steps)
+				self._total_step_times.append(steps)
+				self.__write_exp_log(steps)
+
+		if log_flag:
+			self.__keep_last_replay()
 
-			
\ No newline at end of file
+	def __keep_last_replay(self):
+		'''
+			Leaves the replay of the last run in the output file, as a
+			sequential experiment does
+		'''
+		for i in range(self.__num_runs - 1):
+			os.remove(self.__get_run_output_file(i))
+		os.rename(self.__get_run_output_file(self.__num_runs - 1), self.__output_file)
@@ -1,17 +1,41 @@
 import os
 import math
+import collections
 
-import rtree
+import numpy as np
 
 import shapes
 import coord
+import raycaster
+import edgebuffer
+import edgegrid
+import occupancy
 
 class PolygonMap(object):
 	'''
 		Represents a map in the form of a list of polygons.
+
+		ray_engine: 'broadcast' casts the rays against all the edges near a
+		viewer at once, 'grid' walks the rays through a uniform grid of the
+		edges and suits maps with many obstacles, 'analytic' is like
+		'broadcast' but hits the rectangles and the circles in closed form
+		instead of through their edges, the circles thus being exact.
+
+		visibility_mode: 'rays' samples get_visibility_polygon with num_rays
+		rays, 'exact' computes the exact visibility polygon instead and
+		ignores num_rays, 'adaptive' starts with num_rays rays and refines
+		them around the corners. Batched queries always use rays.
+
+		occupancy_resolution: Side of the cells of the occupancy grids used
+		for the collision checks, 0 checks every polygon instead.
 	'''
 
-	def __init__(self, map_id):
+	RAY_ENGINES = ['broadcast', 'grid', 'analytic']
+	VISIBILITY_MODES = ['rays', 'exact', 'adaptive']
+
+	def __init__(self, map_id, ray_engine='broadcast', visibility_mode='rays', occupancy_resolution=0):
+		assert(ray_engine in PolygonMap.RAY_ENGINES)
+		assert(visibility_mode in PolygonMap.VISIBILITY_MODES)
 		self.__polygons = []
 		self.__boundary_polygon = None
 		self.__all_polygons = None # Includes all the obstacle polygons as well as boundary polygon
@@ -22,8 +46,20 @@ class PolygonMap(object):
 		self.__expanded_polygons = []
 
 		self.__bbox_length = 250
+		self.__ray_engine = ray_engine
+		self.__visibility_mode = visibility_mode
+		self.__sweep_epsilon = 1e-4
+		self.__adaptive_resolution = 0.5
+		self.__grid_cell_size = 25
+		self.__los_memo_resolution = 0
+		self.__los_memo = {}
+		self.__visibility_cache_size = 0
+		self.__visibility_cache_resolution = 0
+		self.__visibility_cache = collections.OrderedDict()
+		self.__visibility_cache_hits = 0
+		self.__visibility_cache_misses = 0
 
-		self.__rtree_idx = rtree.index.Index()
+		self.__ray_directions = {}
 
 		print('Path:', self.__map_name)
 		assert(os.path.isfile(self.__map_name))
@@ -83,12 +119,39 @@ class PolygonMap(object):
 						polygon = shapes.Circle(centre, radius, num_approx_points)
 						# print(str(polygon))
 
-					self.__rtree_idx.insert(len(self.__polygons), polygon.get_rtree_bbox(), obj=polygon)
 					self.__polygons.append(polygon)
 					
 		self.__num_polygons = len(self.__polygons)
 		self.__all_polygons = self.__polygons + [self.__boundary_polygon]
 
+		# Bounding boxes of the obstacles, the row i being the box of polygon i
+		self.__polygon_bboxes = np.array([polygon.get_rtree_bbox() for polygon in self.__polygons], dtype=float).reshape(-1, 4)
+
+		# Primitives hit in closed form by the 'analytic' ray engine, the
+		# boxes being given by the bounding box table
+		self.__box_mask = np.array([isinstance(polygon, shapes.Rectangle) for polygon in self.__polygons], dtype=bool)
+		self.__circle_mask = np.array([isinstance(polygon, shapes.Circle) for polygon in self.__polygons], dtype=bool)
+		self.__circles = np.zeros((self.__num_polygons, 3))
+		for i in np.nonzero(self.__circle_mask)[0]:
+			centre = self.__polygons[i].get_centre()
+			self.__circles[i] = (centre[0], centre[1], self.__polygons[i].get_radius())
+
+		# Edges compiled once into arrays, the boundary being the last polygon
+		self.__edges = edgebuffer.EdgeBuffer(self.__all_polygons)
+		self.__expanded_edges = edgebuffer.EdgeBuffer(self.__expanded_polygons)
+
+		# Also used for the line of sight tests whatever the ray engine
+		self.__edge_grid = edgegrid.EdgeGrid(self.__edges, self.__width, self.__height, self.__grid_cell_size)
+
+		self.__occupancy_resolution = occupancy_resolution
+		self.__occupancy = None
+		self.__expanded_occupancy = None
+		self.__boundary_occupancy = None
+		if self.__occupancy_resolution > 0:
+			self.__occupancy = occupancy.OccupancyGrid(self.__polygons, self.__width, self.__height, self.__occupancy_resolution)
+			self.__expanded_occupancy = occupancy.OccupancyGrid(self.__expanded_polygons, self.__width, self.__height, self.__occupancy_resolution)
+			self.__boundary_occupancy = occupancy.OccupancyGrid([self.__boundary_polygon], self.__width, self.__height, self.__occupancy_resolution)
+
 
 	def get_num_polygons(self):
 		return self.__num_polygons
@@ -106,6 +169,22 @@ class PolygonMap(object):
 	def get_boundary_polygon(self):
 		return self.__boundary_polygon
 
+	def get_edges(self):
+		'''
+			Returns the edge buffer of the obstacles and the boundary. The
+			boundary edges are owned by the polygon id get_num_polygons().
+		'''
+		return self.__edges
+
+	def get_expanded_edges(self):
+		return self.__expanded_edges
+
+	def get_ray_engine(self):
+		return self.__ray_engine
+
+	def get_visibility_mode(self):
+		return self.__visibility_mode
+
 	def get_bbox(self, current_position):
 		bbox = shapes.Square((current_position.get_x(), current_position.get_y()), self.__bbox_length)
 		return bbox
@@ -113,19 +192,91 @@ class PolygonMap(object):
 	def get_map_name(self):
 		return self.__map_name
 
+	def get_occupancy_resolution(self):
+		return self.__occupancy_resolution
+
+	def set_visibility_cache(self, size, resolution=0):
+		'''
+			Keeps the last size visibility polygons which were computed,
+			keyed by the pose of the viewer, the number of rays and the
+			visibility angle. With a resolution the positions are quantized
+			to cells of that side, the polygon computed first in a cell being
+			returned for all the poses in it, otherwise they have to match
+			exactly. A size of 0 disables the cache and empties it.
+		'''
+		self.__visibility_cache_size = size
+		self.__visibility_cache_resolution = resolution
+		self.__visibility_cache = collections.OrderedDict()
+		self.__visibility_cache_hits = 0
+		self.__visibility_cache_misses = 0
+
+	def get_visibility_cache_stats(self):
+		'''
+			Returns the number of hits and misses of the visibility cache
+		'''
+		return self.__visibility_cache_hits, self.__visibility_cache_misses
+
+	def __get_visibility_key(self, mode, position, rotation, num_rays, visibility_angle):
+		x = position.get_x()
+		y = position.get_y()
+		if self.__visibility_cache_resolution != 0:
+			x = int(math.floor(x / self.__visibility_cache_resolution))
+			y = int(math.floor(y / self.__visibility_cache_resolution))
+		return (mode, x, y, rotation, num_rays, visibility_angle)
+
+	def __get_cached_visibility_polygon(self, key):
+		visibility_polygon = self.__visibility_cache.pop(key, None)
+		if visibility_polygon is None:
+			self.__visibility_cache_misses += 1
+			return None
+		# Reinserted as the most recently used
+		self.__visibility_cache[key] = visibility_polygon
+		self.__visibility_cache_hits += 1
+		return visibility_polygon
+
+	def __cache_visibility_polygon(self, key, visibility_polygon):
+		self.__visibility_cache[key] = visibility_polygon
+		if len(self.__visibility_cache) > self.__visibility_cache_size:
+			self.__visibility_cache.popitem(last=False)
+
+	def set_line_of_sight_memo(self, resolution):
+		'''
+			Memoizes the line of sight queries on a grid of the given
+			resolution: two queries whose end points fall in the same pair
+			of cells get the same answer. A resolution of 0 disables the
+			memo and empties it.
+		'''
+		self.__los_memo_resolution = resolution
+		self.__los_memo = {}
+
 	def check_boundary_collision(self, position):
 		'''
 			Returns True if point collides with the boundary
 		'''
+		if self.__boundary_occupancy is not None:
+			return not self.__boundary_occupancy.check_collision(position)
 		if self.__boundary_polygon.is_point_inside(position):
 			return False
 		return True
 
+	def check_boundary_collisions(self, positions):
+		'''
+			Returns a boolean array telling for each of the points whether it
+			collides with the boundary
+		'''
+		if self.__boundary_occupancy is not None:
+			return ~self.__boundary_occupancy.check_collisions(positions)
+		return np.array([self.check_boundary_collision(position) for position in positions], dtype=bool)
+
 	def check_obstacle_collision(self, position, expanded=False):
 		'''
 			Returns True if point collides(is inside) any
 			obstacle polygon.
 		'''
+		if self.__occupancy is not None:
+			if expanded:
+				return self.__expanded_occupancy.check_collision(position)
+			return self.__occupancy.check_collision(position)
 		if expanded:
 			polygons = self.__expanded_polygons
 		else:
@@ -136,59 +287,435 @@ class PolygonMap(object):
 				return True
 		return False
 
+	def check_point_collisions(self, xs, ys):
+		'''
+			Returns a boolean array telling for each point (xs[i], ys[i])
+			whether it collides with an obstacle or the boundary
+		'''
+		if self.__occupancy is not None:
+			return self.__occupancy.contains_points(xs, ys) | ~self.__boundary_occupancy.contains_points(xs, ys)
+		positions = [coord.Coord(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+		return self.check_obstacle_collisions(positions) | self.check_boundary_collisions(positions)
+
+	def check_obstacle_collisions(self, positions, expanded=False):
+		'''
+			Returns a boolean array telling for each of the points whether it
+			collides with any obstacle polygon.
+		'''
+		if self.__occupancy is not None:
+			if expanded:
+				return self.__expanded_occupancy.check_collisions(positions)
+			return self.__occupancy.check_collisions(positions)
+		return np.array([self.check_obstacle_collision(position, expanded) for position in positions], dtype=bool)
+
+	def __get_overlapping_polygon_ids(self, lefts, bottoms, rights, tops):
+		'''
+			Returns the ids of the obstacles whose bounding box overlaps any
+			of the given boxes, boxes which only touch included
+		'''
+		lefts = np.asarray(lefts, dtype=float).reshape(-1, 1)
+		bottoms = np.asarray(bottoms, dtype=float).reshape(-1, 1)
+		rights = np.asarray(rights, dtype=float).reshape(-1, 1)
+		tops = np.asarray(tops, dtype=float).reshape(-1, 1)
+		bboxes = self.__polygon_bboxes
+		overlaps = (bboxes[:, 0] <= rights) & (bboxes[:, 2] >= lefts) & (bboxes[:, 1] <= tops) & (bboxes[:, 3] >= bottoms)
+		return np.nonzero(np.any(overlaps, axis=0))[0].tolist()
+
 	def get_intersected_polygon_ids(self, polygon):
-		return list(self.__rtree_idx.intersection(polygon.get_rtree_bbox()))
+		left, bottom, right, top = polygon.get_rtree_bbox()
+		return self.__get_overlapping_polygon_ids(left, bottom, right, top)
+
+	def __get_ray_directions(self, current_rotation, num_rays, visibility_angle):
+		'''
+			Returns the unit direction vectors of the rays cast for a given
+			rotation along with their rotations in radians. The rotations of
+			the rays only depend on the arguments, therefore they are computed
+			once and cached.
+		'''
+		key = (current_rotation, num_rays, visibility_angle)
+		if key not in self.__ray_directions:
+			directions_x = []
+			directions_y = []
+			rotations = []
+			rotation = current_rotation - visibility_angle
+			offset = (visibility_angle * 2.0)/num_rays
+			while rotation < current_rotation + visibility_angle:
+				directions_x.append(math.cos(coord.Coord.to_radians(-rotation)))
+				directions_y.append(math.sin(coord.Coord.to_radians(-rotation)))
+				rotations.append(coord.Coord.to_radians(rotation))
+				rotation += offset
+			self.__ray_directions[key] = (np.array(directions_x), np.array(directions_y), np.array(rotations))
+		return self.__ray_directions[key]
 
 	def get_visibility_polygon(self, current_position, current_rotation, num_rays, visibility_angle):
-		# c = coord.Coord(self.x, self.y)
-		vis_points = [int(current_position.get_x()), int(current_position.get_y())]
-
-		rotation = current_rotation - visibility_angle
-		offset = (visibility_angle * 2.0)/num_rays
-
-		bbox = self.get_bbox(current_position)
-		hits = list(self.__rtree_idx.intersection(bbox.get_rtree_bbox(), objects=True))
-		polygon_hits = [item.object for item in hits]
-
-		# polygon_ids = [item.id for item in hits]
-		# print('Polygons considered:', polygon_ids)
-		nearby_polygons = polygon_hits + [bbox] + [self.__boundary_polygon]
-		while rotation < current_rotation + visibility_angle:
-			rotation_x = math.cos(coord.Coord.to_radians(-rotation))
-			rotation_y = math.sin(coord.Coord.to_radians(-rotation))
-			r = coord.Coord(current_position.get_x() + rotation_x, current_position.get_y() + rotation_y)
-			rotation += offset
-			if r.get_x() < 0 or r.get_x() > self.__width or r.get_y() < 0 or r.get_y() > self.__height:
-				vis_points.append(int(current_position.get_x()))
-				vis_points.append(int(current_position.get_y()))
-				continue
-			ray = shapes.Line(current_position, r)
-			# print('ray:', ray)
-			closest_intersect = None
-			for polygon in nearby_polygons:
-				# print('polygon:',polygon)
-				for i in range(polygon.get_num_lines()):
-					
-					intersect = shapes.Line.get_intersection(ray, polygon.get_line(i))
-					if not intersect:
-						continue
-					if not closest_intersect or intersect[1] < closest_intersect[1]:
-						closest_intersect = intersect
+		if self.__visibility_mode == 'rays':
+			return self.get_visibility_polygons_batch([current_position], [current_rotation], num_rays, visibility_angle)[0]
+		if self.__visibility_cache_size != 0:
+			key = self.__get_visibility_key(self.__visibility_mode, current_position, current_rotation, num_rays, visibility_angle)
+			visibility_polygon = self.__get_cached_visibility_polygon(key)
+			if visibility_polygon is not None:
+				return visibility_polygon
+		if self.__visibility_mode == 'exact':
+			visibility_polygon = self.get_exact_visibility_polygon(current_position, current_rotation, visibility_angle)
+		else:
+			visibility_polygon = self.get_adaptive_visibility_polygon(current_position, current_rotation, num_rays, visibility_angle)
+		if self.__visibility_cache_size != 0:
+			self.__cache_visibility_polygon(key, visibility_polygon)
+		return visibility_polygon
 
-			
+	def __get_local_segments(self, x, y):
+		'''
+			Returns the edges of the obstacles and boundary near a position
+			together with the edges of its bounding box.
+		'''
+		half_length = int(self.__bbox_length/2)
+		left = x - half_length
+		right = x + half_length
+		bottom = y - half_length
+		top = y + half_length
+		nearby_ids = set(self.__get_overlapping_polygon_ids(left, bottom, right, top))
+		nearby_ids.add(self.__num_polygons)
+		bbox_segments = np.array([[left, bottom, left, top], [left, top, right, top], [right, top, right, bottom], [right, bottom, left, bottom]], dtype=float)
+		return np.vstack((self.__edges.get_segments_of(nearby_ids), bbox_segments))
+
+	def get_exact_visibility_polygon(self, current_position, current_rotation, visibility_angle):
+		'''
+			Returns the exact visibility polygon within the bounding box of a
+			position, without sampling a fixed number of rays.
 
-			if not closest_intersect:
-				print('Closest intersect not found')
-				print('From coordinate:', current_position)
-				print('Ray:', ray)
-				print('Segment:', polygon.get_line(i))
-				continue
+			The boundary of the visible region can only change its supporting
+			edge at the direction of an edge end point or of a crossing of two
+			edges. The edges are swept in the order of these critical angles
+			and one ray is cast just before and one just after each of them,
+			the hits being the vertices of the polygon.
+		'''
+		x = current_position.get_x()
+		y = current_position.get_y()
+		segments = self.__get_local_segments(x, y)
 
-			vis_points.append(int(closest_intersect[0].get_x()))
-			vis_points.append(int(closest_intersect[0].get_y()))
+		x1 = segments[:, 0]
+		y1 = segments[:, 1]
+		x2 = segments[:, 2]
+		y2 = segments[:, 3]
+		crossing_t = raycaster.intersect_rays_segments(x1[:, None], y1[:, None], (x2 - x1)[:, None], (y2 - y1)[:, None], x1, y1, x2, y2)
+		crossing_t[crossing_t > 1] = np.inf
+		rows, cols = np.nonzero(np.isfinite(crossing_t))
+		t = crossing_t[rows, cols]
+		points_x = np.concatenate((x1, x2, x1[rows] + (x2 - x1)[rows] * t))
+		points_y = np.concatenate((y1, y2, y1[rows] + (y2 - y1)[rows] * t))
 
-			
+		half_length = int(self.__bbox_length/2)
+		local = (np.abs(points_x - x) <= half_length + 1) & (np.abs(points_y - y) <= half_length + 1) & ((points_x != x) | (points_y != y))
+		rotations = -np.degrees(np.arctan2(points_y[local] - y, points_x[local] - x))
 
-		vis_points_tuple = tuple(vis_points)
-		visibility_polygon = shapes.Polygon(vis_points_tuple)
-		return visibility_polygon
+		# Angles relative to the start of the field of view
+		start = current_rotation - visibility_angle
+		span = visibility_angle * 2.0
+		angles = np.mod(rotations - start, 360.0)
+		angles = np.unique(np.concatenate((angles - self.__sweep_epsilon, angles + self.__sweep_epsilon)))
+		if span >= 360:
+			angles = np.mod(angles, 360.0)
+		angles = np.unique(np.concatenate((angles[(angles >= 0) & (angles <= span)], [0.0, span])))
+
+		hit_t, _, d_x, d_y = self.__cast_local_rays(x, y, start, angles, segments)
+		return self.__get_fan_polygon(current_position, start, angles, hit_t, d_x, d_y)
+
+	def get_adaptive_visibility_polygon(self, current_position, current_rotation, num_rays, visibility_angle):
+		'''
+			Returns the visibility polygon obtained by casting num_rays rays
+			and then repeatedly adding a ray halfway between any two
+			neighbouring rays which hit different edges, until the angle
+			between them is below the adaptive resolution.
+
+			Rays are therefore only added around the corners of the visible
+			region, and their number grows with the complexity of the scene
+			rather than with the desired accuracy.
+		'''
+		x = current_position.get_x()
+		y = current_position.get_y()
+		segments = self.__get_local_segments(x, y)
+
+		start = current_rotation - visibility_angle
+		span = visibility_angle * 2.0
+		angles = np.linspace(0, span, num_rays + 1)
+		hit_t, hit_idxs, d_x, d_y = self.__cast_local_rays(x, y, start, angles, segments)
+		while True:
+			refine = (hit_idxs[:-1] != hit_idxs[1:]) & (np.diff(angles) > self.__adaptive_resolution)
+			if not np.any(refine):
+				break
+			mid_angles = (angles[:-1][refine] + angles[1:][refine]) / 2.0
+			mid_t, mid_idxs, mid_d_x, mid_d_y = self.__cast_local_rays(x, y, start, mid_angles, segments)
+			order = np.argsort(np.concatenate((angles, mid_angles)), kind='mergesort')
+			angles = np.concatenate((angles, mid_angles))[order]
+			hit_t = np.concatenate((hit_t, mid_t))[order]
+			hit_idxs = np.concatenate((hit_idxs, mid_idxs))[order]
+			d_x = np.concatenate((d_x, mid_d_x))[order]
+			d_y = np.concatenate((d_y, mid_d_y))[order]
+		return self.__get_fan_polygon(current_position, start, angles, hit_t, d_x, d_y)
+
+	def __cast_local_rays(self, x, y, start, angles, segments):
+		'''
+			Casts rays from a position at the given angles, measured from the
+			start rotation, against the local segments.
+		'''
+		# Rounding through the position as the rays do, vertical and
+		# horizontal rays get exactly zero components
+		radians = np.radians(-(start + angles))
+		d_x = (x + np.cos(radians)) - x
+		d_y = (y + np.sin(radians)) - y
+		hit_t, hit_idxs = raycaster.cast_rays(x, y, d_x, d_y, segments)
+		return hit_t, hit_idxs, d_x, d_y
+
+	def __get_fan_polygon(self, current_position, start, angles, hit_t, d_x, d_y):
+		'''
+			Polygon made of the position followed by the hits of the rays
+		'''
+		x = current_position.get_x()
+		y = current_position.get_y()
+		hit = np.isfinite(hit_t)
+		if not np.all(hit):
+			print('Closest intersect not found')
+			print('From coordinate:', current_position)
+		vis_x = x + d_x[hit] * hit_t[hit]
+		vis_y = y + d_y[hit] * hit_t[hit]
+
+		vis_points = np.empty(2 * (vis_x.shape[0] + 1))
+		vis_points[0] = x
+		vis_points[1] = y
+		vis_points[2::2] = vis_x
+		vis_points[3::2] = vis_y
+		ray_angles = np.radians(start + angles[hit]).tolist()
+		return shapes.VisibilityPolygon(vis_points, ray_angles)
+
+	def __cast_rays_analytic(self, ox, oy, dx, dy, polygon_ids):
+		'''
+			Casts the rays against the given obstacles and the boundary, the
+			rectangles and the circles being hit in closed form and the other
+			polygons through their edges. Returns the parameter of the
+			closest hit of every ray.
+		'''
+		polygon_ids = np.array(polygon_ids, dtype=int)
+		boxes = polygon_ids[self.__box_mask[polygon_ids]]
+		circles = polygon_ids[self.__circle_mask[polygon_ids]]
+		others = polygon_ids[~(self.__box_mask | self.__circle_mask)[polygon_ids]].tolist()
+		hit_t, _ = raycaster.cast_rays(ox, oy, dx, dy, self.__edges.get_segments_of(others + [self.__num_polygons]))
+
+		ox = ox[:, None]
+		oy = oy[:, None]
+		dx = dx[:, None]
+		dy = dy[:, None]
+		if boxes.shape[0] != 0:
+			bboxes = self.__polygon_bboxes[boxes]
+			t = raycaster.intersect_rays_boxes(ox, oy, dx, dy, bboxes[:, 0], bboxes[:, 1], bboxes[:, 2], bboxes[:, 3])
+			hit_t = np.minimum(hit_t, np.amin(t, axis=1))
+		if circles.shape[0] != 0:
+			t = raycaster.intersect_rays_circles(ox, oy, dx, dy, self.__circles[circles, 0], self.__circles[circles, 1], self.__circles[circles, 2])
+			hit_t = np.minimum(hit_t, np.amin(t, axis=1))
+		return hit_t
+
+	def get_visibility_polygons_batch(self, positions, rotations, num_rays, visibility_angle):
+		'''
+			Returns the visibility polygons of several viewers at once, the
+			i-th polygon being the one seen from positions[i] facing
+			rotations[i]. Only the viewers missing from the visibility cache
+			are computed.
+		'''
+		if self.__visibility_cache_size == 0:
+			return self.__compute_visibility_polygons_batch(positions, rotations, num_rays, visibility_angle)
+		keys = [self.__get_visibility_key('rays', position, rotation, num_rays, visibility_angle) for position, rotation in zip(positions, rotations)]
+		visibility_polygons = [self.__get_cached_visibility_polygon(key) for key in keys]
+		missing = [i for i, visibility_polygon in enumerate(visibility_polygons) if visibility_polygon is None]
+		if len(missing) != 0:
+			computed = self.__compute_visibility_polygons_batch([positions[i] for i in missing], [rotations[i] for i in missing], num_rays, visibility_angle)
+			for i, visibility_polygon in zip(missing, computed):
+				visibility_polygons[i] = visibility_polygon
+				self.__cache_visibility_polygon(keys[i], visibility_polygon)
+		return visibility_polygons
+
+	def __compute_visibility_polygons_batch(self, positions, rotations, num_rays, visibility_angle):
+		'''
+			The polygons near any of the viewers are gathered once and all the
+			rays of all the viewers are cast against them in a single
+			broadcast. A polygon which is not near a viewer lies outside its
+			bounding box and therefore can never be hit before the box itself,
+			so sharing the polygons does not change any of the results.
+			With the 'grid' ray engine the rays are walked through the edge
+			grid instead.
+		'''
+		num_viewers = len(positions)
+		if num_viewers == 0:
+			return []
+		xs = np.array([position.get_x() for position in positions], dtype=float)
+		ys = np.array([position.get_y() for position in positions], dtype=float)
+
+		directions = [self.__get_ray_directions(rotation, num_rays, visibility_angle) for rotation in rotations]
+		num_viewer_rays = [len(directions_x) for directions_x, _, _ in directions]
+		owners = np.repeat(np.arange(num_viewers), num_viewer_rays)
+		ray_x = xs[owners]
+		ray_y = ys[owners]
+
+		half_length = int(self.__bbox_length/2)
+
+		# Rays whose unit step already leaves the map see nothing
+		r_x = ray_x + np.concatenate([directions_x for directions_x, _, _ in directions])
+		r_y = ray_y + np.concatenate([directions_y for _, directions_y, _ in directions])
+		outside = (r_x < 0) | (r_x > self.__width) | (r_y < 0) | (r_y > self.__height)
+
+		# Same direction as shapes.Line(current_position, r) would use
+		d_x = r_x - ray_x
+		d_y = r_y - ray_y
+
+		# Each viewer sees up to the edges of its own bounding box
+		left = (xs - half_length)[owners]
+		right = (xs + half_length)[owners]
+		bottom = (ys - half_length)[owners]
+		top = (ys + half_length)[owners]
+		bbox_x1 = np.column_stack((left, left, right, right))
+		bbox_y1 = np.column_stack((bottom, top, top, bottom))
+		bbox_x2 = np.column_stack((left, right, right, left))
+		bbox_y2 = np.column_stack((top, top, bottom, bottom))
+		bbox_t = raycaster.intersect_rays_segments(ray_x[:, None], ray_y[:, None], d_x[:, None], d_y[:, None], bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+		limit_t = np.amin(bbox_t, axis=1)
+
+		if self.__ray_engine == 'grid':
+			hit_t, _ = self.__edge_grid.cast_rays(ray_x, ray_y, d_x, d_y, limit_t)
+		else:
+			nearby_ids = self.__get_overlapping_polygon_ids(xs - half_length, ys - half_length, xs + half_length, ys + half_length)
+			if self.__ray_engine == 'analytic':
+				hit_t = self.__cast_rays_analytic(ray_x, ray_y, d_x, d_y, nearby_ids)
+			else:
+				segments = self.__edges.get_segments_of(nearby_ids + [self.__num_polygons])
+				hit_t, _ = raycaster.cast_rays(ray_x, ray_y, d_x, d_y, segments)
+		hit_t = np.minimum(hit_t, limit_t)
+
+		with np.errstate(invalid='ignore'):
+			hit_x = ray_x + d_x * hit_t
+			hit_y = ray_y + d_y * hit_t
+
+		not_found = ~outside & np.isinf(hit_t)
+		if np.any(not_found):
+			print('Closest intersect not found')
+			for i in np.unique(owners[not_found]):
+				print('From coordinate:', positions[i])
+
+		vis_x = np.where(outside, ray_x, hit_x)
+		vis_y = np.where(outside, ray_y, hit_y)
+
+		visibility_polygons = []
+		start = 0
+		for i in range(num_viewers):
+			end = start + num_viewer_rays[i]
+			keep = ~not_found[start:end]
+			star_points = np.empty(2 * (np.count_nonzero(keep) + 1))
+			star_points[0] = xs[i]
+			star_points[1] = ys[i]
+			star_points[2::2] = vis_x[start:end][keep]
+			star_points[3::2] = vis_y[start:end][keep]
+			vis_points = star_points.astype(int)
+			ray_angles = directions[i][2][keep].tolist()
+			visibility_polygons.append(shapes.VisibilityPolygon(vis_points, ray_angles, star_points))
+			start = end
+		return visibility_polygons
+
+	def __check_segments_clear(self, x1s, y1s, x2s, y2s):
+		'''
+			Returns for each segment whether it crosses no edge before its
+			end point, walking the segments through the edge grid.
+
+			The segments are cast from a millionth of a pixel past their
+			start, as an edge going through the start, such as the map
+			border under a viewer standing on it, would otherwise block
+			them at once.
+		'''
+		x1s = np.asarray(x1s, dtype=float)
+		y1s = np.asarray(y1s, dtype=float)
+		d_x = np.asarray(x2s, dtype=float) - x1s
+		d_y = np.asarray(y2s, dtype=float) - y1s
+		if x1s.shape[0] == 0:
+			return np.zeros(0, dtype=bool)
+		lengths = np.hypot(d_x, d_y)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			t_start = np.where(lengths != 0, np.minimum(1e-6 / lengths, 1), 0)
+		t_end = 1 - t_start
+		hit_t, _ = self.__edge_grid.cast_rays(x1s + d_x * t_start, y1s + d_y * t_start, d_x, d_y, t_end)
+		return hit_t >= t_end - 1e-12
+
+	def __check_lines_of_sight(self, x1s, y1s, x2s, y2s):
+		if self.__los_memo_resolution == 0:
+			return self.__check_segments_clear(x1s, y1s, x2s, y2s)
+		x1s = np.asarray(x1s, dtype=float)
+		y1s = np.asarray(y1s, dtype=float)
+		x2s = np.asarray(x2s, dtype=float)
+		y2s = np.asarray(y2s, dtype=float)
+		resolution = float(self.__los_memo_resolution)
+		cells_1 = zip(np.floor(x1s / resolution).astype(int).tolist(), np.floor(y1s / resolution).astype(int).tolist())
+		cells_2 = zip(np.floor(x2s / resolution).astype(int).tolist(), np.floor(y2s / resolution).astype(int).tolist())
+		# The line of sight is symmetric
+		keys = [(cell_1, cell_2) if cell_1 <= cell_2 else (cell_2, cell_1) for cell_1, cell_2 in zip(cells_1, cells_2)]
+
+		clear = np.zeros(len(keys), dtype=bool)
+		missing = []
+		for i, key in enumerate(keys):
+			value = self.__los_memo.get(key)
+			if value is None:
+				missing.append(i)
+			else:
+				clear[i] = value
+		if len(missing) != 0:
+			missing = np.array(missing, dtype=int)
+			clear[missing] = self.__check_segments_clear(x1s[missing], y1s[missing], x2s[missing], y2s[missing])
+			for i in missing.tolist():
+				self.__los_memo[keys[i]] = bool(clear[i])
+		return clear
+
+	def line_of_sight(self, point_a, point_b):
+		'''
+			Returns True if no edge of the map blocks the segment between
+			the two points
+		'''
+		return bool(self.lines_of_sight([point_a], [point_b])[0])
+
+	def lines_of_sight(self, points_a, points_b):
+		'''
+			Returns a boolean array telling for each pair (points_a[i],
+			points_b[i]) whether no edge of the map blocks the segment
+			between them
+		'''
+		x1s = [point.get_x() for point in points_a]
+		y1s = [point.get_y() for point in points_a]
+		x2s = [point.get_x() for point in points_b]
+		y2s = [point.get_y() for point in points_b]
+		return self.__check_lines_of_sight(x1s, y1s, x2s, y2s)
+
+	def get_fields_of_view_matrix(self, positions, rotations, visibility_angle, targets):
+		'''
+			Returns a boolean matrix whose (i, j) entry tells whether a viewer
+			at positions[i] facing rotations[i] sees targets[j], without
+			building any visibility polygon.
+
+			A target is seen if it lies within the field of view, within the
+			bounding box of the viewer and no edge blocks the segment between
+			them. The line of sight is only tested for the pairs passing the
+			first two checks.
+		'''
+		matrix = np.zeros((len(positions), len(targets)), dtype=bool)
+		if len(positions) == 0 or len(targets) == 0:
+			return matrix
+		xs = np.array([position.get_x() for position in positions], dtype=float)[:, None]
+		ys = np.array([position.get_y() for position in positions], dtype=float)[:, None]
+		target_xs = np.array([target.get_x() for target in targets], dtype=float)[None, :]
+		target_ys = np.array([target.get_y() for target in targets], dtype=float)[None, :]
+		d_x = target_xs - xs
+		d_y = target_ys - ys
+
+		half_length = int(self.__bbox_length/2)
+		in_range = (np.abs(d_x) <= half_length) & (np.abs(d_y) <= half_length) & ((d_x != 0) | (d_y != 0))
+		if visibility_angle < 180:
+			start = np.array(rotations, dtype=float)[:, None] - visibility_angle
+			target_rotations = -np.degrees(np.arctan2(d_y, d_x))
+			in_range &= np.mod(target_rotations - start, 360.0) <= 2 * visibility_angle
+
+		viewers, seen = np.nonzero(in_range)
+		clear = self.__check_lines_of_sight(xs[viewers, 0], ys[viewers, 0], target_xs[0, seen], target_ys[0, seen])
+		matrix[viewers[clear], seen[clear]] = True
+		return matrix
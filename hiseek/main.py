@@ -14,6 +14,10 @@ def main():
 	parser.add_argument("-r", "--replay", action="store_true", help="This mode replays the game of hide/seek stored in a replay file.")
 
 	parser.add_argument("-n", "--num_runs", type=int, default = 1, help="Number of simulations to be performed.")
+	parser.add_argument("-w", "--workers", type=int, default = 1, help="Number of processes running the simulations in parallel, only used in simulation mode.")
+	parser.add_argument("-g", "--games", type=int, default = 1, help="Number of simulations stepped together on the same map, only used in simulation mode.")
+	parser.add_argument("-nrl", "--no_replay_log", action="store_true", help="Does not save the replay of the games in simulation mode, nor the paths in the statistics, so that the visibility polygons are only computed when the percept mode needs them.")
+	parser.add_argument("-seed", "--seed", type=int, default = None, help="Seed of the first simulation, the following ones using the next integers. Unseeded simulations are not reproducible.")
 	parser.add_argument("-mh", "--mode_hiders", default = "random", help="Hider's mode, strategy to be used by the hider team during simulations.")
 	parser.add_argument("-ms", "--mode_seekers", default = "random", help="Seeker's mode, strategy to be used by the seeker team during simulations.")
 	parser.add_argument("-nh", "--num_hiders", type=int, default = 1, help="Number of hiders to be used in each simulation.")
@@ -27,6 +31,13 @@ def main():
 	parser.add_argument("-tq", "--time_quanta", action="store_false", help="Sets time quanta, used for updating the players distance, to variable.(fixed/variable)")
 	parser.add_argument("-nr", "--num_rays", type=int, default = 10, help="Number of rays to be used for calculating visibility region of an agent.")
 	parser.add_argument("-va", "--visibility_angle", type=int, default = 45, help="Visibility angle")
+	parser.add_argument("-re", "--ray_engine", choices = ["broadcast", "grid", "analytic"], default = "broadcast", help="Ray casting engine used for visibility, 'grid' is faster on maps with many obstacles, 'analytic' hits rectangles and circles in closed form.")
+	parser.add_argument("-vm", "--visibility_mode", choices = ["rays", "exact", "adaptive"], default = "rays", help="Visibility polygons used by the AI, 'exact' computes them exactly, 'adaptive' adds rays only around corners instead of casting a fixed number of rays.")
+	parser.add_argument("-or", "--occupancy_resolution", type=int, default = 0, help="Cell size in pixels of the occupancy grids used for collision checks, 0 checks the obstacle polygons directly.")
+	parser.add_argument("-pm", "--percept_mode", choices = ["polygon", "analytic", "snapped"], default = "polygon", help="How players detect each other, 'analytic' checks the field of view and line of sight directly instead of using visibility polygons, 'snapped' looks the poses snapped to a 10 pixel grid up in a precomputed visibility table. Both still compute the visibility polygons for the replay and the display, use -nrl to skip them in simulation mode.")
+	parser.add_argument("-vc", "--visibility_cache", type=int, default = 0, help="Number of visibility polygons kept in a cache keyed by the pose of the player, 0 disables it.")
+	parser.add_argument("-me", "--mover_engine", choices = ["objects", "arrays"], default = "objects", help="How the players are moved in simulation mode, 'arrays' keeps them all in arrays and moves them in a single vectorized step.")
+	parser.add_argument("-prof", "--profile", action="store_true", help="Times every phase of every tick, writing a summary and the times of each tick next to the statistics of each run.")
 	parser.add_argument("-hi", "--hider_image", default="dark_hider.png", help="Hider's image used during visualisations.")
 	parser.add_argument("-si", "--seeker_image", default="dark_seeker.png", help="Seeker's image used during visualisations.")
 	
@@ -74,8 +85,8 @@ def main():
 		if mode_count == 0:
 			print('No mode selected, using vis_sim mode as default.')
 			args.vis_sim = True
-		conf_options = config.Configuration(int(args.fps), int(args.velocity), args.time_quanta, int(args.num_rays), int(args.visibility_angle), int(args.verbose), args.save_frame, args.hider_image, args.seeker_image, args.show_fellows, args.show_opponent, args.texture_flag, args.full_screen)
-		exp = experiment.Experiment(args.visualisation, args.simulation, args.vis_sim, args.replay, args.num_runs, args.mode_hiders, args.mode_seekers, args.num_hiders, args.num_seekers, args.map_id, args.input_file, args.output_file, conf_options)
+		conf_options = config.Configuration(int(args.fps), int(args.velocity), args.time_quanta, int(args.num_rays), int(args.visibility_angle), int(args.verbose), args.save_frame, args.hider_image, args.seeker_image, args.show_fellows, args.show_opponent, args.texture_flag, args.full_screen, args.ray_engine, args.visibility_mode, int(args.occupancy_resolution), args.percept_mode, args.visibility_cache, args.mover_engine, args.profile)
+		exp = experiment.Experiment(args.visualisation, args.simulation, args.vis_sim, args.replay, args.num_runs, args.mode_hiders, args.mode_seekers, args.num_hiders, args.num_seekers, args.map_id, args.input_file, args.output_file, conf_options, args.workers, args.seed, args.games, not args.no_replay_log)
 		exp.run()
 
 
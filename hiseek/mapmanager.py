@@ -17,6 +17,59 @@ import coord
 import action
 import shapes
 
+# Inference maps already read by this process, keyed by file name and shared
+# by all the map managers of the process as they are never modified once
+# loaded, which the read only flag enforces
+_loaded_inference_maps = {}
+
+def load_inference_map(file_name):
+	if file_name not in _loaded_inference_maps:
+		print('Loading file', file_name)
+		inference_map = np.loadtxt(file_name)
+		inference_map.setflags(write=False)
+		_loaded_inference_maps[file_name] = inference_map
+	return _loaded_inference_maps[file_name]
+
+# Per process (so per worker) caches of the pickled points and rtree indexes,
+# keyed by file name. The points are marked covered or explored during a
+# game, so only their bytes are kept and every map manager unpickles its own
+# copy. The indexes are only queried once loaded and are shared read only.
+# Storing a file again drops it from the cache.
+_loaded_pickles = {}
+_loaded_rtree_indexes = {}
+
+def load_pickle(file_name):
+	if file_name not in _loaded_pickles:
+		pfile = open(file_name, 'rb')
+		_loaded_pickles[file_name] = pfile.read()
+		pfile.close()
+	return pickle.loads(_loaded_pickles[file_name])
+
+def load_rtree_index(file_name):
+	if file_name not in _loaded_rtree_indexes:
+		_loaded_rtree_indexes[file_name] = rtree.index.Index(file_name)
+	return _loaded_rtree_indexes[file_name]
+
+def forget_loaded_file(file_name):
+	_loaded_pickles.pop(file_name, None)
+	_loaded_rtree_indexes.pop(file_name, None)
+
+def load_map_files(map_name):
+	'''
+		Reads the inference maps, the strategic and coverage points and
+		their indexes of a map which are on disk, so that all the map
+		managers later created by the process share them
+	'''
+	for extension in ['.visibility', '.obstruction']:
+		if os.path.isfile(map_name + extension):
+			load_inference_map(map_name + extension)
+	for extension in ['.st_pts', '.cpts', '.contours']:
+		if os.path.isfile(map_name + extension):
+			load_pickle(map_name + extension)
+	for extension in ['.st_pts_index', '.cpts_index']:
+		if os.path.isfile(map_name + extension + '.idx'):
+			load_rtree_index(map_name + extension)
+
 class BasicMapManager(object):
 	'''
 		Each agent is associated with a map manager which helps it to manage
@@ -39,72 +92,65 @@ class BasicMapManager(object):
 		self.__velocity = velocity
 		self._visibility = None
 		self._obstruction = None
-		self._visibility_idx = None
+		self._free_cells = None
 		self._obstruction_penta = [0, 0, 0, 0, 0]
 		self._visibility_penta = [0, 0, 0, 0, 0]
 		self.__max_cells_visible = 0
 		self.__inference_map = inference_map
 		self._map_name = mapworld.get_map_name().split('.')[0]
+		self._random = random.Random()
+		self._np_random = np.random.RandomState()
 
 		vis_file = self._map_name + '.visibility'
 		obs_file = self._map_name + '.obstruction'
-		idx_file = self._map_name + '.index'
 		if self.__inference_map:
-			if os.path.isfile(vis_file) and os.path.isfile(obs_file) and os.path.isfile(idx_file+'.idx'):
-				print('Loading files', vis_file, obs_file, idx_file)
-				self._visibility = np.loadtxt(vis_file)
-				self._obstruction = np.loadtxt(obs_file)
-				self._visibility_idx = rtree.index.Index(idx_file)
+			if os.path.isfile(vis_file) and os.path.isfile(obs_file):
+				self._visibility = load_inference_map(vis_file)
+				self._obstruction = load_inference_map(obs_file)
+				self._free_cells = self._visibility != -1
 			else:
 				print('Creating inferences XX')
 				self._visibility = np.zeros((self.__num_rows, self.__num_cols))
 				self._obstruction = np.zeros((self.__num_rows, self.__num_cols))
 				# print('Visibility shape:', self._visibility.shape)
-				self._visibility_idx = rtree.index.Index(idx_file)
 				print('Entered map manager')
-				id_counter = 0 
 				for i in range(self.__num_rows):
 					for j in range(self.__num_cols):
 						position = coord.Coord(i * self.__offset, j * self.__offset)
 						if self._mapworld.check_obstacle_collision(position):
 							self._visibility[i, j] = -1
 							self._obstruction[i, j] = -1
-						else:
-							x_min = position.get_x()
-							y_min = position.get_y() - self.__offset
-							x_max = position.get_x() + self.__offset
-							y_max = position.get_y()
-							bound_box = (x_min, y_min, x_max, y_max)
-							# print(bound_box)
-							# print(type(self._visibility_idx))
-							self._visibility_idx.insert(id_counter, bound_box, obj=(i, j))
-							id_counter += 1
+				# Final as soon as the obstacles are marked, the counts below
+				# only going up, and needed by get_nearby_visibility_cells
+				self._free_cells = self._visibility != -1
 
 				# print('Filled all obstacles')
 				# print(self._visibility)
 				####
+				# Cell pairs are checked both ways round, the memo only serving
+				# the line of sight queries of the exact visibility mode
+				exact = self._mapworld.get_visibility_mode() == 'exact'
+				if exact:
+					self._mapworld.set_line_of_sight_memo(self.__offset)
 				for i in range(self.__num_rows):
 					for j in range(self.__num_cols):
 						print('Analyzing:',i,j)
 						coord_vis = coord.Coord(i * self.__offset, j * self.__offset)
 						if self._visibility[i, j] != -1:
-							visibility_polygon = self.get_360_visibility_polygon(coord_vis)
-							bbox = self._mapworld.get_bbox(coord_vis).get_rtree_bbox()
-							common_boxes = [box.object for box in self._visibility_idx.intersection(bbox, objects=True)]
+							common_boxes = self.get_nearby_visibility_cells(coord_vis).tolist()
 							# print('Common boxes for:',i,j, len(common_boxes))
-							for a,b in common_boxes:
-								coord_obs = coord.Coord(a * self.__offset, b * self.__offset)
-								if visibility_polygon.is_point_inside(coord_obs):
+							coords_obs = [coord.Coord(a * self.__offset, b * self.__offset) for a, b in common_boxes]
+							visible_flags = self.get_360_visible_flags(coord_vis, coords_obs)
+							for (a, b), visible in zip(common_boxes, visible_flags):
+								if visible:
 									self._visibility[i, j] += 1
 									self._obstruction[a, b] += 1
+				if exact:
+					self._mapworld.set_line_of_sight_memo(0)
 
 				np.savetxt(self._map_name.split('.')[0] + '.visibility',self._visibility)
 				np.savetxt(self._map_name.split('.')[0] + '.obstruction', self._obstruction)
 				####
-				self._visibility_idx.close()
-				# Reinitializing idx since .close() makes the idx unusable
-				self._visibility_idx = rtree.index.Index(idx_file)
-
 
 			self.__max_cells_visible = np.amax(self._visibility)
 			print('Max cells visible:', self.__max_cells_visible)
@@ -127,12 +173,34 @@ class BasicMapManager(object):
 	def get_map_name(self):
 		return self._map_name
 
+	def set_seed(self, seed):
+		'''
+			Seeds the random choices of points made by the map manager
+		'''
+		self._random = random.Random(seed)
+		self._np_random = np.random.RandomState(seed)
+
 	def get_visibility_polygon(self, current_position, current_rotation, num_rays, visibility_angle):
 		return self._mapworld.get_visibility_polygon(current_position, current_rotation, num_rays, visibility_angle)
 
 	def get_360_visibility_polygon(self, position, num_rays=10):
 		return self.get_visibility_polygon(position, 0, num_rays, 180)
 
+	def get_visible_flags(self, position, rotation, num_rays, visibility_angle, targets):
+		'''
+			Returns for each target whether it lies in the visibility region
+			of the position. On maps in the exact visibility mode this is
+			answered by line of sight queries, without building the
+			visibility polygon.
+		'''
+		if self._mapworld.get_visibility_mode() == 'exact':
+			return self._mapworld.get_fields_of_view_matrix([position], [rotation], visibility_angle, targets)[0].tolist()
+		visibility_polygon = self.get_visibility_polygon(position, rotation, num_rays, visibility_angle)
+		return [visibility_polygon.is_point_inside(target) for target in targets]
+
+	def get_360_visible_flags(self, position, targets, num_rays=10):
+		return self.get_visible_flags(position, 0, num_rays, 180, targets)
+
 	def __get_position_index(self, position):
 		row = int(position.get_x())%self.__offset
 		col = int(position.get_y())%self.__offset
@@ -199,6 +267,25 @@ class BasicMapManager(object):
 		# print('Position:', str(position), 'Obstruction value:', obs_val, 'Obs level:', obs_level)
 		return obs_level
 
+	def get_nearby_visibility_cells(self, current_position):
+		'''
+			Returns an array of the (row, col) indices of the free cells
+			touching the bounding box of the position. The cell (i, j)
+			spans [i, i + 1] * offset along x and [j - 1, j] * offset along y.
+		'''
+		left, bottom, right, top = self._mapworld.get_bbox(current_position).get_rtree_bbox()
+		offset = self.__offset
+		row_min = max(int(math.floor(left / offset)) - 2, 0)
+		row_max = min(int(math.floor(right / offset)) + 1, self.__num_rows - 1)
+		col_min = max(int(math.floor(bottom / offset)) - 1, 0)
+		col_max = min(int(math.floor(top / offset)) + 2, self.__num_cols - 1)
+		rows = np.arange(row_min, row_max + 1)
+		cols = np.arange(col_min, col_max + 1)
+		rows = rows[(rows * offset <= right) & ((rows + 1) * offset >= left)]
+		cols = cols[((cols - 1) * offset <= top) & (cols * offset >= bottom)]
+		row_idxs, col_idxs = np.nonzero(self._free_cells[np.ix_(rows, cols)])
+		return np.column_stack((rows[row_idxs], cols[col_idxs]))
+
 	def get_blockage_value(self, position):
 		return self._mapworld.check_obstacle_collision(position)
 
@@ -326,23 +413,24 @@ class StrategicPointsMapManager(BasicMapManager):
 		# there is no obstacle between them
 
 	def __store_strategic_points(self):
+		forget_loaded_file(self.__sp_file)
 		spfile = open(self.__sp_file, 'wb')
 		# for stp in self._strategic_opints:
 		pickle.dump(self._strategic_points, spfile, pickle.HIGHEST_PROTOCOL)
 		spfile.close()
 
 	def __store_strategic_points_index(self):
+		forget_loaded_file(self.__sp_idx_file)
 		self.__strategic_pts_idx.close()
 		# .close() makes the st pt inaccessible, therefore reopening it
 		self.__strategic_pts_idx = rtree.index.Index(self.__sp_idx_file)
 
 
 	def __load_strategic_points(self):
-		spfile = open(self.__sp_file, 'rb')
-		self._strategic_points = pickle.load(spfile)
+		self._strategic_points = load_pickle(self.__sp_file)
 
 	def __load_strategic_points_index(self):
-		self.__strategic_pts_idx = rtree.index.Index(self.__sp_idx_file)
+		self.__strategic_pts_idx = load_rtree_index(self.__sp_idx_file)
 
 
 
@@ -361,7 +449,7 @@ class StrategicPointsMapManager(BasicMapManager):
 		bound_box = (cx, cy, cx, cy)
 		closest_st_pts = list(self.__strategic_pts_idx.nearest(bound_box, num_points))
 		if len(closest_st_pts) > num_points:
-			closest_st_pts = list(np.random.choice(closest_st_pts, num_points, replace=False))
+			closest_st_pts = list(self._np_random.choice(closest_st_pts, num_points, replace=False))
 		return closest_st_pts
 
 		# for i in range(self._num_strategic_points):
@@ -372,10 +460,6 @@ class StrategicPointsMapManager(BasicMapManager):
 		# 		min_dist = dist
 		# return min_pt
 
-	def get_nearby_visibility_cells(self, current_position):
-		bbox = self._mapworld.get_bbox(current_position).get_rtree_bbox()
-		nearby_cells = [box.object for box in self._visibility_idx.intersection(bbox, objects=True)]
-		return nearby_cells
 
 
 class StrategicPoint(coord.Coord):
@@ -510,7 +594,7 @@ class CoveragePointsMapManager(StrategicPointsMapManager):
 		closest_coverage_pts = list(self._coverage_pts_idx.nearest(bound_box, num_points))
 		# print('Closest points:', closest_coverage_pts)
 		if len(closest_coverage_pts) != num_points:
-			closest_coverage_pts = list(np.random.choice(closest_coverage_pts, num_points, replace=False))
+			closest_coverage_pts = list(self._np_random.choice(closest_coverage_pts, num_points, replace=False))
 		return closest_coverage_pts
 
 	def get_strategic_point_clique_ids(self, strategic_point_id):
@@ -521,31 +605,32 @@ class CoveragePointsMapManager(StrategicPointsMapManager):
 		return self._cliques[coverage_point_id]
 
 	def __store_coverage_points(self):
+		forget_loaded_file(self.__cp_file)
 		cpfile = open(self.__cp_file, 'wb')
 		pickle.dump(self._coverage_points, cpfile, pickle.HIGHEST_PROTOCOL)
 		cpfile.close()
 
 	def __store_coverage_points_index(self):
+		forget_loaded_file(self.__cp_idx_file)
 		self._coverage_pts_idx.close()
 		# .close() makes the cpt idx inaccessible, therefore reopening it
 		self._coverage_pts_idx = rtree.index.Index(self.__cp_idx_file)
 
 	def __store_coverage_contours(self):
+		forget_loaded_file(self.__contours_file)
 		ccfile = open(self.__contours_file, 'wb')
 		print('Storing coverage contours:', self._coverage_contours)
 		pickle.dump(self._coverage_contours, ccfile, pickle.HIGHEST_PROTOCOL)
 		ccfile.close()
 
 	def __load_coverage_points(self):
-		cpfile = open(self.__cp_file, 'rb')
-		self._coverage_points = pickle.load(cpfile)
+		self._coverage_points = load_pickle(self.__cp_file)
 
 	def __load_coverage_points_index(self):
-		self._coverage_pts_idx = rtree.index.Index(self.__cp_idx_file)
+		self._coverage_pts_idx = load_rtree_index(self.__cp_idx_file)
 
 	def __load_coverage_contours(self):
-		ccfile = open(self.__contours_file, 'rb')
-		self._coverage_contours = pickle.load(ccfile)
+		self._coverage_contours = load_pickle(self.__contours_file)
 
 	def __create_visibility_graph(self):
 		self.__add_visibility_nodes()
@@ -555,19 +640,16 @@ class CoveragePointsMapManager(StrategicPointsMapManager):
 		strategic_visibility = []
 		for i in range(self._num_strategic_points):
 			stp = self._strategic_points[i]
-			visibility_polygon = self.get_360_visibility_polygon(stp, 40)
 			# print('')
 			del strategic_visibility[:]
 			# print('Strategic point:', stp.get_x(), stp.get_y())
-			# print('Visibility polygon:', str(visibility_polygon))
-			bbox = self._mapworld.get_bbox(stp).get_rtree_bbox()
-			# print('BBOX:', bbox)
-			common_boxes = [box.object for box in self._visibility_idx.intersection(bbox, objects=True)]
+			common_boxes = self.get_nearby_visibility_cells(stp).tolist()
 			# print('Common boxes for point:', stp.get_x(), stp.get_y(),len(common_boxes))
-			for a,b in common_boxes:
-				box_coord = self.get_coord_from_cell(a, b)
-				# print('Box coord:', str(box_coord))
-				if visibility_polygon.is_point_inside(box_coord):
+			box_coords = [self.get_coord_from_cell(a, b) for a, b in common_boxes]
+			visible_flags = self.get_360_visible_flags(stp, box_coords, 40)
+			for (a, b), visible in zip(common_boxes, visible_flags):
+				# print('Box coord:', a, b)
+				if visible:
 					# self.__strategic_visibility[i].append((a,b))
 					strategic_visibility.append((a,b))
 			# print('Actually visible:', len(strategic_visibility))
@@ -620,15 +702,14 @@ class CoveragePointsMapManager(StrategicPointsMapManager):
 			coverage_point = None
 			for cell in cvisible_cells:
 				cell_coord = self.get_coord_from_cell(cell[0], cell[1])
-				visibility_polygon = self.get_360_visibility_polygon(cell_coord, 300)
+				visible_flags = self.get_360_visible_flags(cell_coord, [self._strategic_points[node] for node in clique], 300)
 				all_flag = True
 
 				del nodes_covered[:]
 				num_nodes_covered = 0
 
-				for node in clique:
-					cst_adj_pt = self._strategic_points[node]
-					if not visibility_polygon.is_point_inside(cst_adj_pt):
+				for node, visible in zip(clique, visible_flags):
+					if not visible:
 						all_flag = False
 						# break
 					else:
@@ -1026,7 +1107,7 @@ class OffsetPointsMapManager(BasicMapManager):
 	def get_random_adjacent_obstacle(self, offset_obstacle):
 		obs_id = offset_obstacle.get_obstacle_id()
 		neighbor_ids = self.__obstacle_graph.neighbors(obs_id)
-		random_idx = random.randint(0, len(neighbor_ids)-1)
+		random_idx = self._random.randint(0, len(neighbor_ids)-1)
 		random_obs_id = neighbor_ids[random_idx]
 		return self.get_offset_obstacle(random_obs_id)
 
@@ -0,0 +1,208 @@
+import numpy as np
+
+import percept
+import action
+import coord
+
+class MoverArrays(object):
+	'''
+		Positions, rotations, actions and active flags of all the movers of
+		one or more games on the same map kept in arrays, the hiders of a
+		game coming first and its seekers after them. The arrays are laid
+		out game after game, so reshaping them to (num_games, num_movers)
+		gives the movers of a game in a row.
+
+		A tick moves every mover in a single vectorized step with the same
+		arithmetic as Mover.update, reverting the ones ending in an obstacle
+		or outside the boundary. Only the obstruction of the movers by each
+		other, which depends on the order in which they move, is resolved
+		one mover at a time, each game on its own.
+	'''
+
+	NO_ACTION = -1
+
+	def __init__(self, polygon_map, num_hiders, num_seekers, fps, velocity, fixed_time_quanta, num_games=1):
+		self.__polygon_map = polygon_map
+		self.__num_hiders = num_hiders
+		self.__num_seekers = num_seekers
+		self.__num_movers = num_hiders + num_seekers
+		self.__num_games = num_games
+		self.__fps = fps
+		self.__velocity = velocity
+		self.__fixed_time_quanta = fixed_time_quanta
+
+		n = self.__num_movers * num_games
+		self.__x = np.zeros(n, dtype=float)
+		self.__y = np.zeros(n, dtype=float)
+		self.__rotation = np.zeros(n, dtype=float)
+		self.__prev_x = np.zeros(n, dtype=float)
+		self.__prev_y = np.zeros(n, dtype=float)
+		self.__prev_rotation = np.zeros(n, dtype=float)
+		self.__action = np.full(n, MoverArrays.NO_ACTION, dtype=int)
+		self.__motion = np.zeros(n, dtype=bool)
+		self.__active = np.ones(n, dtype=bool)
+
+		self.__percepts = [percept.GraphicsPercept([],[],[],[]) for i in range(n)]
+		self.__visibility_polygons = [None for i in range(n)]
+
+		# Headings and unit directions of the actions, ST staying in place
+		self.__rotations = np.zeros(action.Action.num_actions, dtype=float)
+		self.__directions_x = np.zeros(action.Action.num_actions, dtype=float)
+		self.__directions_y = np.zeros(action.Action.num_actions, dtype=float)
+		for act in action.Action.all_directions:
+			self.__rotations[act] = action.ROTATION[act]
+			self.__directions_x[act] = action.VECTOR[act].get_x_component()
+			self.__directions_y[act] = action.VECTOR[act].get_y_component()
+
+	def get_num_movers(self):
+		return self.__num_movers
+
+	def get_num_games(self):
+		return self.__num_games
+
+	def get_hider(self, i, game=0):
+		return MoverView(self, game * self.__num_movers + i)
+
+	def get_seeker(self, i, game=0):
+		return MoverView(self, game * self.__num_movers + self.__num_hiders + i)
+
+	def set_hider_inactive(self, i, game=0):
+		self.__active[game * self.__num_movers + i] = False
+
+	def set_seeker_inactive(self, i, game=0):
+		self.__active[game * self.__num_movers + self.__num_hiders + i] = False
+
+	def set_game_inactive(self, game):
+		self.__active[game * self.__num_movers:(game + 1) * self.__num_movers] = False
+
+	def get_active(self):
+		return self.__active
+
+	def get_x(self, idx):
+		return self.__x[idx]
+
+	def get_y(self, idx):
+		return self.__y[idx]
+
+	def get_rotation(self, idx):
+		return self.__rotation[idx]
+
+	def set_position(self, idx, x, y):
+		self.__x[idx] = x
+		self.__y[idx] = y
+
+	def get_action(self, idx):
+		act = self.__action[idx]
+		if act == MoverArrays.NO_ACTION:
+			return None
+		return int(act)
+
+	def set_action(self, idx, act):
+		self.__action[idx] = act
+
+	def set_motion(self, idx, motion):
+		self.__motion[idx] = bool(motion)
+
+	def get_percept(self, idx):
+		return self.__percepts[idx]
+
+	def set_percept(self, idx, current_percept):
+		self.__percepts[idx] = current_percept
+
+	def get_visibility_polygon(self, idx):
+		return self.__visibility_polygons[idx]
+
+	def set_visibility_polygon(self, idx, visibility_polygon):
+		self.__visibility_polygons[idx] = visibility_polygon
+
+	def revert_configuration(self, idx):
+		self.__x[idx] = self.__prev_x[idx]
+		self.__y[idx] = self.__prev_y[idx]
+		self.__rotation[idx] = self.__prev_rotation[idx]
+
+	def update(self, dt):
+		'''
+			Moves all the active movers by one tick, the hiders first and the
+			seekers after them, a mover ending on the exact position of an
+			earlier one of its game going back to where it was.
+		'''
+		idxs = np.nonzero(self.__active)[0]
+		self.__prev_x[idxs] = self.__x[idxs]
+		self.__prev_y[idxs] = self.__y[idxs]
+		self.__prev_rotation[idxs] = self.__rotation[idxs]
+
+		acts = self.__action[idxs]
+		turning = (acts != action.Action.ST) & (acts != MoverArrays.NO_ACTION)
+		self.__rotation[idxs[turning]] = self.__rotations[acts[turning]]
+
+		if self.__fixed_time_quanta:
+			time_quanta = 1.0/self.__fps
+		else:
+			time_quanta = dt
+
+		moving = idxs[turning & self.__motion[idxs]]
+		moving_acts = self.__action[moving]
+		self.__x[moving] = self.__x[moving] + (self.__velocity * self.__directions_x[moving_acts]) * time_quanta
+		self.__y[moving] = self.__y[moving] + (self.__velocity * self.__directions_y[moving_acts]) * time_quanta
+
+		# Movers going back are checked again where they came from
+		collided = self.__polygon_map.check_point_collisions(self.__x[idxs], self.__y[idxs])
+		if collided.any():
+			reverted = idxs[collided]
+			self.revert_configuration(reverted)
+			collided[collided] = self.__polygon_map.check_point_collisions(self.__x[reverted], self.__y[reverted])
+
+		# Hashed on the exact position, as obstruction means equal coordinates
+		occupied_positions = set()
+		games = (idxs // self.__num_movers).tolist()
+		for k, (x, y) in enumerate(zip(self.__x[idxs].tolist(), self.__y[idxs].tolist())):
+			if k != 0 and games[k] != games[k - 1]:
+				occupied_positions = set()
+			if collided[k] or (x, y) in occupied_positions:
+				self.revert_configuration(idxs[k])
+			else:
+				occupied_positions.add((x, y))
+
+class MoverView(object):
+	'''
+		A single mover of MoverArrays, with the interface of Mover so that
+		the simulator exchanges percepts and actions with the teams in the
+		same way whichever engine moves the players.
+	'''
+
+	def __init__(self, mover_arrays, idx):
+		self.__mover_arrays = mover_arrays
+		self.__idx = idx
+
+	def get_current_coordinate(self):
+		return coord.Coord(float(self.__mover_arrays.get_x(self.__idx)), float(self.__mover_arrays.get_y(self.__idx)))
+
+	def get_rotation(self):
+		return float(self.__mover_arrays.get_rotation(self.__idx))
+
+	def set_action(self, act):
+		self.__mover_arrays.set_action(self.__idx, act)
+
+	def set_motion(self, motion):
+		self.__mover_arrays.set_motion(self.__idx, motion)
+
+	def get_action(self):
+		return self.__mover_arrays.get_action(self.__idx)
+
+	def set_percept(self, current_percept):
+		self.__mover_arrays.set_percept(self.__idx, current_percept)
+
+	def get_percept(self):
+		return self.__mover_arrays.get_percept(self.__idx)
+
+	def revert_configuration(self):
+		self.__mover_arrays.revert_configuration(self.__idx)
+
+	def set_position(self, position):
+		self.__mover_arrays.set_position(self.__idx, position.get_x(), position.get_y())
+
+	def get_visibility_polygon(self):
+		return self.__mover_arrays.get_visibility_polygon(self.__idx)
+
+	def set_visibility_polygon(self, visibility_polygon):
+		self.__mover_arrays.set_visibility_polygon(self.__idx, visibility_polygon)
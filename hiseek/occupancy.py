@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+import matplotlib.path as mplPath
+
+import shapes
+import coord
+
+class OccupancyGrid(object):
+	'''
+		Rasterized occupancy of a list of polygons.
+
+		Every cell of the grid is either free (no point of the cell lies
+		inside a polygon), full (every point of the cell lies inside a
+		polygon) or mixed. Queries falling on free and full cells are
+		answered by an array lookup, the few queries falling on mixed cells
+		use the exact is_point_inside test of the polygons crossing the cell.
+	'''
+
+	FREE = 0
+	FULL = 1
+	MIXED = 2
+
+	def __init__(self, polygons, width, height, resolution):
+		self.__polygons = polygons
+		self.__resolution = float(resolution)
+		self.__num_cols = int(width // self.__resolution) + 1
+		self.__num_rows = int(height // self.__resolution) + 1
+		self.__states = np.zeros((self.__num_rows, self.__num_cols), dtype=np.int8)
+
+		candidates = {}
+		for i, polygon in enumerate(polygons):
+			row_min, row_max, col_min, col_max = self.__get_cell_range(polygon)
+			if row_min >= row_max or col_min >= col_max:
+				continue
+			block = self.__rasterize(polygon, row_min, row_max, col_min, col_max)
+			full = block == OccupancyGrid.FULL
+			self.__states[row_min:row_max, col_min:col_max][full] = OccupancyGrid.FULL
+			rows, cols = np.nonzero(block == OccupancyGrid.MIXED)
+			for row, col in zip((rows + row_min).tolist(), (cols + col_min).tolist()):
+				candidates.setdefault(row * self.__num_cols + col, []).append(i)
+
+		# Cells which are full because of some polygon need no exact test
+		self.__candidates = {}
+		for cell, polygon_ids in candidates.items():
+			row = cell // self.__num_cols
+			col = cell % self.__num_cols
+			if self.__states[row, col] != OccupancyGrid.FULL:
+				self.__states[row, col] = OccupancyGrid.MIXED
+				self.__candidates[cell] = polygon_ids
+
+	def get_resolution(self):
+		return self.__resolution
+
+	def get_states(self):
+		return self.__states
+
+	def get_num_mixed_cells(self):
+		return len(self.__candidates)
+
+	def __get_cell_range(self, polygon):
+		segments = polygon.get_segment_array()
+		x_min = min(np.amin(segments[:, 0]), np.amin(segments[:, 2]))
+		x_max = max(np.amax(segments[:, 0]), np.amax(segments[:, 2]))
+		y_min = min(np.amin(segments[:, 1]), np.amin(segments[:, 3]))
+		y_max = max(np.amax(segments[:, 1]), np.amax(segments[:, 3]))
+		col_min = max(int(math.floor(x_min / self.__resolution)) - 1, 0)
+		col_max = min(int(math.floor(x_max / self.__resolution)) + 2, self.__num_cols)
+		row_min = max(int(math.floor(y_min / self.__resolution)) - 1, 0)
+		row_max = min(int(math.floor(y_max / self.__resolution)) + 2, self.__num_rows)
+		return row_min, row_max, col_min, col_max
+
+	def __rasterize(self, polygon, row_min, row_max, col_min, col_max):
+		'''
+			Returns the states of the cells in a block of the grid with
+			respect to a single polygon. The cells are closed squares, so a
+			point on the border of two cells is covered by both.
+		'''
+		cell_x0 = np.arange(col_min, col_max) * self.__resolution
+		cell_y0 = np.arange(row_min, row_max) * self.__resolution
+		x0, y0 = np.meshgrid(cell_x0, cell_y0)
+		x1 = x0 + self.__resolution
+		y1 = y0 + self.__resolution
+		block = np.full(x0.shape, OccupancyGrid.MIXED, dtype=np.int8)
+
+		if isinstance(polygon, shapes.Rectangle):
+			# Rectangles are open: is_point_inside uses strict inequalities
+			left = polygon.get_left_edge()
+			right = polygon.get_right_edge()
+			bottom = polygon.get_bottom_edge()
+			top = polygon.get_top_edge()
+			block[(left < x0) & (x1 < right) & (bottom < y0) & (y1 < top)] = OccupancyGrid.FULL
+			block[(x1 <= left) | (x0 >= right) | (y1 <= bottom) | (y0 >= top)] = OccupancyGrid.FREE
+		elif isinstance(polygon, shapes.Circle):
+			# Circles are open disks
+			c_x, c_y = polygon.get_centre()
+			radius2 = polygon.get_radius()**2
+			far_x = np.maximum(np.abs(x0 - c_x), np.abs(x1 - c_x))
+			far_y = np.maximum(np.abs(y0 - c_y), np.abs(y1 - c_y))
+			near_x = np.maximum(np.maximum(x0 - c_x, c_x - x1), 0)
+			near_y = np.maximum(np.maximum(y0 - c_y, c_y - y1), 0)
+			block[far_x**2 + far_y**2 < radius2] = OccupancyGrid.FULL
+			block[near_x**2 + near_y**2 >= radius2] = OccupancyGrid.FREE
+		else:
+			# Cells crossed by an edge are mixed, the others are entirely on
+			# one side of the outline and their centre tells which one
+			crossed = np.zeros(x0.shape, dtype=bool)
+			epsilon = 1e-6 * self.__resolution
+			for e_x1, e_y1, e_x2, e_y2 in polygon.get_segment_array():
+				crossed |= (x0 <= max(e_x1, e_x2) + epsilon) & (x1 >= min(e_x1, e_x2) - epsilon) & (y0 <= max(e_y1, e_y2) + epsilon) & (y1 >= min(e_y1, e_y2) - epsilon)
+			path = mplPath.Path(np.array([vertex.get_tuple() for vertex in polygon.get_vertices()], dtype=float))
+			centres = np.column_stack(((x0 + x1).ravel() / 2.0, (y0 + y1).ravel() / 2.0))
+			inside = path.contains_points(centres).reshape(x0.shape)
+			block[~crossed & inside] = OccupancyGrid.FULL
+			block[~crossed & ~inside] = OccupancyGrid.FREE
+		return block
+
+	def __check_exact(self, position, polygon_ids):
+		for i in polygon_ids:
+			if self.__polygons[i].is_point_inside(position):
+				return True
+		return False
+
+	def check_collision(self, position):
+		'''
+			Returns True if the point is inside any of the polygons
+		'''
+		col = int(math.floor(position.get_x() / self.__resolution))
+		row = int(math.floor(position.get_y() / self.__resolution))
+		if row < 0 or row >= self.__num_rows or col < 0 or col >= self.__num_cols:
+			return self.__check_exact(position, range(len(self.__polygons)))
+		state = self.__states[row, col]
+		if state == OccupancyGrid.FREE:
+			return False
+		if state == OccupancyGrid.FULL:
+			return True
+		return self.__check_exact(position, self.__candidates[row * self.__num_cols + col])
+
+	def check_collisions(self, positions):
+		'''
+			Returns a boolean array telling for each of the points whether
+			it is inside any of the polygons
+		'''
+		xs = np.array([position.get_x() for position in positions], dtype=float)
+		ys = np.array([position.get_y() for position in positions], dtype=float)
+		return self.contains_points(xs, ys)
+
+	def contains_points(self, xs, ys):
+		'''
+			Returns a boolean array telling for each point (xs[i], ys[i])
+			whether it is inside any of the polygons
+		'''
+		cols = np.floor(xs / self.__resolution).astype(int)
+		rows = np.floor(ys / self.__resolution).astype(int)
+		in_grid = (rows >= 0) & (rows < self.__num_rows) & (cols >= 0) & (cols < self.__num_cols)
+		states = np.full(xs.shape[0], OccupancyGrid.MIXED, dtype=np.int8)
+		states[in_grid] = self.__states[rows[in_grid], cols[in_grid]]
+		collided = states == OccupancyGrid.FULL
+		for i in np.nonzero(states == OccupancyGrid.MIXED)[0]:
+			collided[i] = self.check_collision(coord.Coord(float(xs[i]), float(ys[i])))
+		return collided
@@ -1,6 +1,7 @@
 import functools
 
 try:
+    from ompl import util as ou
     from ompl import base as ob
     from ompl import geometric as og
 except:
@@ -15,10 +16,36 @@ except:
 
 import coord
 
+_ompl_seeded = False
+
+def seed_ompl(seed):
+    '''
+        Seeds OMPL, which only takes the seed of a process before it creates
+        its first generator, so only the first call of a process counts.
+        The planners then draw their random states from generators seeded in
+        the order they are created, so the paths only repeat when the
+        process plays the same games in the same order, as a sequential or
+        vectorised experiment does, but not the workers of a parallel one.
+    '''
+    global _ompl_seeded
+    if _ompl_seeded:
+        return
+    # OMPL ignores a zero seed
+    ou.RNG.setSeed(seed % (2**32 - 1) + 1)
+    _ompl_seeded = True
+
 class BasicPlanner(object):
+    '''
+        Plans the paths with RRT*.
+
+        solve_iterations: Number of iterations of a solve, so that the paths
+        do not depend on the speed of the machine. Solves use OMPL's time
+        budget when None.
+    '''
 
-    def __init__(self, map_manager):
+    def __init__(self, map_manager, solve_iterations=None):
         self._map_manager = map_manager
+        self._solve_iterations = solve_iterations
         # self._space = ob.SE2StateSpace()
         self._space = ob.RealVectorStateSpace()
         self._space.addDimension(0.0, self._map_manager.get_map().get_map_width())
@@ -99,7 +126,10 @@ class BasicPlanner(object):
         for i in range(2):
             if self._setup.getPlanner():
                 self._setup.getPlanner().clear()
-            self._setup.solve()
+            if self._solve_iterations is None:
+                self._setup.solve()
+            else:
+                self._setup.solve(self.__get_termination_condition())
 
         # assert(self._setup.haveSolutionPath())
         if self._setup.haveSolutionPath():
@@ -120,6 +150,17 @@ class BasicPlanner(object):
             # print(self._path)
 
 
+    def __get_termination_condition(self):
+        '''
+            Condition ending a solve after solve_iterations checks, the
+            planner checking it once per iteration
+        '''
+        num_checks = [0]
+        def terminate():
+            num_checks[0] += 1
+            return num_checks[0] > self._solve_iterations
+        return ob.PlannerTerminationCondition(ob.PlannerTerminationConditionFn(terminate))
+
     def isStateValid(self, state):
         x = float(state[0])
         y = float(state[1])
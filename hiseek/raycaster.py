@@ -0,0 +1,89 @@
+import numpy as np
+
+def intersect_rays_segments(ox, oy, dx, dy, x1, y1, x2, y2):
+	'''
+		Returns the ray parameter at which each ray hits each segment, inf
+		where the ray misses the segment.
+
+		Rays are given as origin (ox, oy) and direction (dx, dy), segments as
+		their end points. All the arguments are numpy arrays which are
+		broadcast against each other, so rays of shape (M, 1) against segments
+		of shape (E,) give an (M, E) result.
+
+		Follows shapes.Line.get_intersection: parallel segments are ignored,
+		hits behind the origin are ignored and the segment end points are
+		inclusive.
+	'''
+	s_dx = x2 - x1
+	s_dy = y2 - y1
+	denominator = s_dx * dy - s_dy * dx
+	with np.errstate(divide='ignore', invalid='ignore'):
+		t2 = (dx * (y1 - oy) + dy * (ox - x1)) / denominator
+		t1 = np.where(dx != 0, (x1 + s_dx * t2 - ox) / dx, (y1 + s_dy * t2 - oy) / dy)
+		valid = (denominator != 0) & (t1 >= 0) & (t2 >= 0) & (t2 <= 1)
+	return np.where(valid, t1, np.inf)
+
+def cast_rays(ox, oy, dx, dy, segments):
+	'''
+		Casts M rays against an (E, 4) array of segments (x1, y1, x2, y2)
+		in a single broadcast.
+
+		Returns the parameter of the closest hit of every ray (inf if the ray
+		hits nothing) and the index of the segment which was hit.
+	'''
+	ox = np.asarray(ox, dtype=float).reshape(-1, 1)
+	oy = np.asarray(oy, dtype=float).reshape(-1, 1)
+	dx = np.asarray(dx, dtype=float).reshape(-1, 1)
+	dy = np.asarray(dy, dtype=float).reshape(-1, 1)
+	t = intersect_rays_segments(ox, oy, dx, dy, segments[:, 0], segments[:, 1], segments[:, 2], segments[:, 3])
+	hit_idxs = np.argmin(t, axis=1)
+	hit_t = t[np.arange(t.shape[0]), hit_idxs]
+	return hit_t, hit_idxs
+
+def intersect_rays_boxes(ox, oy, dx, dy, left, bottom, right, top):
+	'''
+		Returns the ray parameter at which each ray hits the outline of each
+		axis aligned box, inf where the ray misses the box. Same broadcasting
+		as intersect_rays_segments.
+
+		Slab test: a ray entering the box hits it where it enters, a ray
+		starting inside the box hits it where it leaves. The outline is
+		inclusive, like the end points of the edges.
+	'''
+	with np.errstate(divide='ignore', invalid='ignore'):
+		t_x1 = (left - ox) / dx
+		t_x2 = (right - ox) / dx
+		t_y1 = (bottom - oy) / dy
+		t_y2 = (top - oy) / dy
+	# A ray parallel to a slab is inside it for all t or for none
+	inside_x = (left <= ox) & (ox <= right)
+	inside_y = (bottom <= oy) & (oy <= top)
+	t_x_near = np.where(dx != 0, np.minimum(t_x1, t_x2), np.where(inside_x, -np.inf, np.inf))
+	t_x_far = np.where(dx != 0, np.maximum(t_x1, t_x2), np.where(inside_x, np.inf, -np.inf))
+	t_y_near = np.where(dy != 0, np.minimum(t_y1, t_y2), np.where(inside_y, -np.inf, np.inf))
+	t_y_far = np.where(dy != 0, np.maximum(t_y1, t_y2), np.where(inside_y, np.inf, -np.inf))
+	t_near = np.maximum(t_x_near, t_y_near)
+	t_far = np.minimum(t_x_far, t_y_far)
+	t = np.where(t_near >= 0, t_near, t_far)
+	return np.where((t_near <= t_far) & (t >= 0), t, np.inf)
+
+def intersect_rays_circles(ox, oy, dx, dy, cx, cy, radius):
+	'''
+		Returns the ray parameter at which each ray hits each circle, inf
+		where the ray misses the circle. Same broadcasting as
+		intersect_rays_segments.
+
+		A ray starting inside the circle hits it where it leaves.
+	'''
+	f_x = ox - cx
+	f_y = oy - cy
+	a = dx * dx + dy * dy
+	b = f_x * dx + f_y * dy
+	c = f_x * f_x + f_y * f_y - radius * radius
+	discriminant = b * b - a * c
+	with np.errstate(invalid='ignore'):
+		root = np.sqrt(discriminant)
+		t_near = (-b - root) / a
+		t_far = (-b + root) / a
+	t = np.where(t_near >= 0, t_near, t_far)
+	return np.where((discriminant >= 0) & (t >= 0), t, np.inf)
@@ -1,4 +1,5 @@
 import math
+import bisect
 
 import numpy as np
 import matplotlib.path as mplPath
@@ -104,6 +105,7 @@ class Polygon(object):
 		self.__point_analysis = point_analysis
 		self.__mpl_path = None
 		self.__points_tuple = points_tuple
+		self.__segment_array = None
 
 		if offset == 1.0:
 			i = 0
@@ -201,6 +203,20 @@ class Polygon(object):
 	def get_points_tuple(self):
 		return self.__points_tuple
 
+	def get_segment_array(self):
+		'''
+			Returns the outer boundary lines as an (N, 4) float array of
+			(x1, y1, x2, y2) rows, in the order of the vertices.
+			Helps in casting many rays at once.
+		'''
+		if self.__segment_array is None:
+			points = np.array([vertex.get_tuple() for vertex in self.__vertices], dtype=float).reshape(-1, 2)
+			if len(self.__vertices) > 2:
+				self.__segment_array = np.hstack((points, np.roll(points, -1, axis=0)))
+			else:
+				self.__segment_array = np.hstack((points[:-1], points[1:]))
+		return self.__segment_array
+
 	def get_num_vertices(self):
 		return self.__num_vertices
 
@@ -213,6 +229,283 @@ class Polygon(object):
 		print('Not CALLABLE')
 		return
 
+class ArrayPolygon(object):
+	'''
+		Polygon whose vertices are kept in a single (N, 2) array instead of
+		lists of Coord and Line objects. The array given is used without any
+		copy, the Coord vertices, the points tuple and the matplotlib path
+		only being built when asked for.
+	'''
+
+	def __init__(self, points):
+		self.__points = np.asarray(points).reshape(-1, 2)
+		self.__points_tuple = None
+		self.__vertices = None
+		self.__mpl_path = None
+
+	def __str__(self):
+		return self.get_vertices_string()
+
+	def get_points(self):
+		return self.__points
+
+	def get_num_vertices(self):
+		return self.__points.shape[0]
+
+	def get_vertex(self, i):
+		assert(i < self.get_num_vertices())
+		return self.get_vertices()[i]
+
+	def get_vertices(self):
+		if self.__vertices is None:
+			self.__vertices = [coord.Coord(x, y) for x, y in self.__points.tolist()]
+		return self.__vertices
+
+	def get_vertices_string(self):
+		return ', '.join([str(x)+':'+str(y) for x, y in self.__points.tolist()])
+
+	def get_points_tuple(self):
+		if self.__points_tuple is None:
+			self.__points_tuple = tuple(self.__points.ravel().tolist())
+		return self.__points_tuple
+
+	def get_points_string(self):
+		'''
+			Returns the points as written in the replays, the same string as
+			str(self.get_points_tuple())[1:-1]
+		'''
+		return ', '.join([str(value) for value in self.__points.ravel().tolist()])
+
+	def get_segment_array(self):
+		points = self.__points.astype(float)
+		if points.shape[0] > 2:
+			return np.hstack((points, np.roll(points, -1, axis=0)))
+		return np.hstack((points[:-1], points[1:]))
+
+	def get_area(self):
+		x = self.__points[:, 0].astype(float)
+		y = self.__points[:, 1].astype(float)
+		return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2.0
+
+	def get_rtree_bbox(self):
+		'''
+			Get a coordinate tuple in accordance to the rtree specifics
+		'''
+		left, bottom = np.amin(self.__points, axis=0).tolist()
+		right, top = np.amax(self.__points, axis=0).tolist()
+		return (left, bottom, right, top)
+
+	def __get_mpl_path(self):
+		if self.__mpl_path is None:
+			self.__mpl_path = mplPath.Path(self.__points.astype(float))
+		return self.__mpl_path
+
+	def is_point_inside(self, point):
+		assert(isinstance(point, coord.Coord))
+		return self.__get_mpl_path().contains_point((point.get_x(), point.get_y()))
+
+	def contains_points(self, xs, ys):
+		'''
+			Returns a boolean array telling for each point (xs[i], ys[i])
+			whether it is inside the polygon
+		'''
+		points = np.column_stack((np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)))
+		return self.__get_mpl_path().contains_points(points)
+
+class VisibilityPolygon(ArrayPolygon):
+	'''
+		Visibility polygon made of the position of the viewer followed by the
+		points hit by its rays, ordered by angle.
+
+		Such a polygon is star-shaped around the viewer: it is the fan of
+		the triangles made by the viewer and two consecutive hits. A point
+		is therefore inside if it is on the viewer's side of the edge
+		between the two hits whose rays enclose the angle of the point,
+		which needs a binary search and a single side test.
+
+		ray_angles: Clockwise angles in radians of the rays which produced
+		the hits, increasing. Only used to unwrap the angles of the hits,
+		which are otherwise unwrapped from one hit to the next.
+
+		star_points: The viewer and the hits before any rounding, laid out as
+		points. The points may be truncated to integers for display, the
+		star test is then done on star_points so that the binary search and
+		the side test see the same vertices.
+	'''
+
+	def __init__(self, points, ray_angles=None, star_points=None):
+		super(VisibilityPolygon, self).__init__(points)
+		if star_points is None:
+			star_points = self.get_points()
+		self.__star_points = np.asarray(star_points, dtype=float).reshape(-1, 2)
+		self.__ray_angles = ray_angles
+		self.__angles = None
+		self.__hits = None
+		self.__star_analysis = False
+
+	def create_star_representation(self):
+		'''
+			Computes the angles of the hits around the viewer, unwrapped so
+			that they keep increasing along a full circle.
+
+			Hits on the viewer itself, and hits whose angle does not exceed
+			the one of the hit kept before them, are dropped, so that no edge
+			of the fan is degenerate and the angles strictly increase.
+		'''
+		origin = self.__star_points[0]
+		hits = self.__star_points[1:]
+		d_x = hits[:, 0] - origin[0]
+		d_y = hits[:, 1] - origin[1]
+		off_origin = (d_x != 0) | (d_y != 0)
+		hits = hits[off_origin]
+		angles = np.arctan2(-d_y[off_origin], d_x[off_origin])
+		if self.__ray_angles is not None and len(self.__ray_angles) == off_origin.shape[0]:
+			ray_angles = np.asarray(self.__ray_angles, dtype=float)[off_origin]
+			angles += 2 * math.pi * np.round((ray_angles - angles) / (2 * math.pi))
+		else:
+			angles = np.unwrap(angles)
+		if angles.shape[0] != 0:
+			previous = np.maximum.accumulate(angles)
+			increasing = np.concatenate(([True], angles[1:] > previous[:-1]))
+			hits = hits[increasing]
+			angles = angles[increasing]
+		self.__hits = hits
+		self.__angles = angles
+		self.__star_analysis = True
+
+	def get_star_representation(self):
+		'''
+			Returns the viewer, the angles of the hits and the hits used by
+			the star test
+		'''
+		if not self.__star_analysis:
+			self.create_star_representation()
+		return self.__star_points[0], self.__angles, self.__hits
+
+	def is_point_inside(self, point):
+		assert(isinstance(point, coord.Coord))
+		origin, angles, hits = self.get_star_representation()
+		if angles.shape[0] < 2:
+			return super(VisibilityPolygon, self).is_point_inside(point)
+
+		x = point.get_x() - origin[0]
+		y = point.get_y() - origin[1]
+		if x == 0 and y == 0:
+			return False
+		first_angle = angles[0]
+		angle = math.atan2(-y, x)
+		angle += 2 * math.pi * math.ceil((first_angle - angle) / (2 * math.pi))
+		if angle > angles[-1]:
+			return False
+
+		i = min(bisect.bisect_right(angles, angle), angles.shape[0] - 1) - 1
+
+		# The point and the viewer have to be on the same side of the edge
+		a_x = hits[i, 0] - origin[0]
+		a_y = hits[i, 1] - origin[1]
+		e_x = hits[i + 1, 0] - origin[0] - a_x
+		e_y = hits[i + 1, 1] - origin[1] - a_y
+		point_side = e_x * (y - a_y) - e_y * (x - a_x)
+		origin_side = e_y * a_x - e_x * a_y
+		return point_side * origin_side > 0
+
+	def get_ray_angles(self):
+		return self.get_star_representation()[1]
+
+	@staticmethod
+	def get_visibility_matrix(visibility_polygons, xs, ys):
+		'''
+			Returns a boolean matrix whose (i, j) entry tells whether the
+			point (xs[j], ys[j]) is inside the i-th visibility polygon.
+
+			The angles of all the polygons are laid one after the other, each
+			polygon being shifted well past the previous one, so that a
+			single searchsorted finds the enclosing rays of every pair.
+		'''
+		xs = np.asarray(xs, dtype=float)
+		ys = np.asarray(ys, dtype=float)
+		return VisibilityPolygon.__get_fan_matrix(visibility_polygons, xs[None, :], ys[None, :])
+
+	@staticmethod
+	def get_paired_visibility_matrix(visibility_polygons, xs, ys):
+		'''
+			Returns a boolean matrix whose (i, j) entry tells whether the
+			point (xs[i, j], ys[i, j]) is inside the i-th visibility polygon,
+			each polygon being only tested against its own row of points.
+
+			xs, ys: (num_polygons, num_points) arrays
+		'''
+		xs = np.asarray(xs, dtype=float)
+		ys = np.asarray(ys, dtype=float)
+		return VisibilityPolygon.__get_fan_matrix(visibility_polygons, xs, ys)
+
+	@staticmethod
+	def __get_fan_matrix(visibility_polygons, xs, ys):
+		'''
+			Tests the points of xs and ys, of one row shared by all the
+			polygons or of one row per polygon, against the polygons
+		'''
+		num_polygons = len(visibility_polygons)
+		num_points = xs.shape[1]
+		matrix = np.zeros((num_polygons, num_points), dtype=bool)
+
+		fan_rows = []
+		for i, polygon in enumerate(visibility_polygons):
+			if isinstance(polygon, VisibilityPolygon) and polygon.get_ray_angles().shape[0] >= 2:
+				fan_rows.append(i)
+			else:
+				row = i if xs.shape[0] != 1 else 0
+				for j in range(num_points):
+					matrix[i, j] = polygon.is_point_inside(coord.Coord(xs[row, j], ys[row, j]))
+		if not fan_rows or num_points == 0:
+			return matrix
+		if xs.shape[0] != 1:
+			xs = xs[fan_rows]
+			ys = ys[fan_rows]
+
+		shift = 4 * math.pi
+		angles = []
+		hits = []
+		origins = []
+		starts = []
+		lengths = []
+		for k, i in enumerate(fan_rows):
+			origin, ray_angles, polygon_hits = visibility_polygons[i].get_star_representation()
+			starts.append(sum(lengths))
+			lengths.append(ray_angles.shape[0])
+			angles.append(ray_angles - ray_angles[0] + k * shift)
+			hits.append(polygon_hits)
+			origins.append(origin)
+		angles = np.concatenate(angles)
+		starts = np.array(starts)[:, None]
+		lengths = np.array(lengths)[:, None]
+		first_angles = np.array([visibility_polygons[i].get_ray_angles()[0] for i in fan_rows])[:, None]
+		origins = np.array(origins)
+		hits = np.concatenate(hits)
+
+		x = xs - origins[:, 0:1]
+		y = ys - origins[:, 1:2]
+		angle = np.arctan2(-y, x)
+		angle += 2 * math.pi * np.ceil((first_angles - angle) / (2 * math.pi))
+		angle -= first_angles
+		last_angles = angles[starts[:, 0] + lengths[:, 0] - 1][:, None] - np.arange(len(fan_rows))[:, None] * shift
+		in_range = (angle <= last_angles) & ((x != 0) | (y != 0))
+
+		shifted = angle + np.arange(len(fan_rows))[:, None] * shift
+		idxs = np.searchsorted(angles, shifted, side='right')
+		idxs = np.minimum(idxs, starts + lengths - 1) - 1
+		idxs = np.maximum(idxs, starts)
+
+		a_x = hits[idxs, 0] - origins[:, 0:1]
+		a_y = hits[idxs, 1] - origins[:, 1:2]
+		e_x = hits[idxs + 1, 0] - origins[:, 0:1] - a_x
+		e_y = hits[idxs + 1, 1] - origins[:, 1:2] - a_y
+		point_side = e_x * (y - a_y) - e_y * (x - a_x)
+		origin_side = e_y * a_x - e_x * a_y
+		matrix[fan_rows] = in_range & (point_side * origin_side > 0)
+		return matrix
+
+
 class BoundedPolygon(Polygon):
 	'''
 		Polygon bounded by a rectangle
@@ -6,15 +6,19 @@ import pyglet
 
 import statistic
 import gamemap
+import shapes
 import team
 import percept
 import action
 import graphics
 import agent
 import coord
+import visibilitytable
+import moverarrays
+import tickprofiler
 
 class Mover(object):
-	def __init__(self, polygon_map, pos_x, pos_y, pos_rot, fps, velocity, fixed_time_quanta, num_rays, visibility_angle):
+	def __init__(self, polygon_map, pos_x, pos_y, pos_rot, fps, velocity, fixed_time_quanta):
 		self.__x = pos_x
 		self.__y = pos_y
 		self.__rotation = pos_rot
@@ -28,8 +32,6 @@ class Mover(object):
 		self.__current_percept = percept.GraphicsPercept([],[],[],[])
 
 		self.__polygon_map = polygon_map
-		self.__num_rays = num_rays
-		self.__visibility_angle = visibility_angle
 		self.__visibility_polygon = None
 
 		self.__fps = fps
@@ -63,7 +65,6 @@ class Mover(object):
 		self.__x = self.__prev_x
 		self.__y = self.__prev_y
 		self.__rotation = self.__prev_rotation
-		self.__update_visibility()
 
 	def set_visibility(self, visibility):
 		self.visible = visibility
@@ -75,10 +76,12 @@ class Mover(object):
 	def get_visibility_polygon(self):
 		return self.__visibility_polygon
 
-	def __update_visibility(self):
-		self.__visibility_polygon = self.__polygon_map.get_visibility_polygon(self.get_current_coordinate(), self.__rotation, self.__num_rays, self.__visibility_angle)
-		# print('Poly tuples:', self.__visibility_polygon.get_points_tuple())
-		# self.__visibility_vertices.vertices = self.__visibility_polygon.get_points_tuple()
+	def set_visibility_polygon(self, visibility_polygon):
+		'''
+			The simulator computes the visibility polygons of all the movers
+			together once they have moved
+		'''
+		self.__visibility_polygon = visibility_polygon
 
 	def update(self, dt):
 		self.__dx = 0
@@ -114,8 +117,6 @@ class Mover(object):
 		collided = self.__polygon_map.check_obstacle_collision(current_position) or self.__polygon_map.check_boundary_collision(current_position)
 		if collided:
 			self.revert_configuration()
-
-		self.__update_visibility()
 		# print('x,y:',self.__x,self.__y)
 
 class Simulator(object):
@@ -126,7 +127,26 @@ class Simulator(object):
 	mode_type_hiders = ['random', 'bayesian', 'sbandit', 'hm_sbandit', 'hv_sbandit', 'hmv_sbandit', 'human', 'offset']
 	mode_type_seekers = ['random', 'sbandit', 'coverage', 'cc', 'human', 'wave', 'trap']
 
-	def __init__(self, mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, input_file, output_file, conf_options, log_flag, vis_flag, total_step_times, sim_turn, max_steps=1000, window_width=640, window_height=360):
+	@staticmethod
+	def create_polygon_maps(map_id, conf_options):
+		'''
+			Returns the map of the simulation and the copies given to the
+			hider and the seeker teams
+		'''
+		ray_engine = conf_options.get_ray_engine()
+		occupancy_resolution = conf_options.get_occupancy_resolution()
+		polygon_map = gamemap.PolygonMap(map_id, ray_engine, occupancy_resolution=occupancy_resolution)
+		polygon_map.set_visibility_cache(conf_options.get_visibility_cache())
+
+		# Only the maps of the teams use the visibility mode, the players
+		# are drawn with a fixed number of rays
+		hider_map_copy = gamemap.PolygonMap(map_id, ray_engine, conf_options.get_visibility_mode(), occupancy_resolution)
+		seeker_map_copy = gamemap.PolygonMap(map_id, ray_engine, conf_options.get_visibility_mode(), occupancy_resolution)
+		hider_map_copy.set_visibility_cache(conf_options.get_visibility_cache())
+		seeker_map_copy.set_visibility_cache(conf_options.get_visibility_cache())
+		return polygon_map, hider_map_copy, seeker_map_copy
+
+	def __init__(self, mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, input_file, output_file, conf_options, log_flag, vis_flag, total_step_times, sim_turn, max_steps=None, window_width=640, window_height=360, seed=None, polygon_maps=None, mover_arrays=None, game=0):
 		assert(mode_hiders in Simulator.mode_type_hiders)
 		assert(mode_seekers in Simulator.mode_type_seekers)
 
@@ -145,6 +165,15 @@ class Simulator(object):
 		self.__verbose = self.__conf_options.get_verbose()
 		self.__num_rays = self.__conf_options.get_num_rays()
 		self.__visibility_angle = self.__conf_options.get_visibility_angle()
+		self.__ray_engine = self.__conf_options.get_ray_engine()
+		self.__visibility_mode = self.__conf_options.get_visibility_mode()
+		self.__occupancy_resolution = self.__conf_options.get_occupancy_resolution()
+		self.__percept_mode = self.__conf_options.get_percept_mode()
+		self.__visibility_cache = self.__conf_options.get_visibility_cache()
+		self.__mover_engine = self.__conf_options.get_mover_engine()
+		self.__profiler = None
+		if self.__conf_options.get_profile():
+			self.__profiler = tickprofiler.TickProfiler()
 		self.__show_fellows = self.__conf_options.get_show_fellows()
 		self.__show_opponent = self.__conf_options.get_show_opponent()
 
@@ -152,7 +181,14 @@ class Simulator(object):
 		self.__stats = statistic.Statistic(num_hiders, num_seekers, self.__map_id, self.__sim_turn)
 		self.__max_steps = max_steps
 		self.__steps = 0
-		self.__polygon_map = gamemap.PolygonMap(map_id)
+		# Games stepped together share their maps, built once by the caller
+		if polygon_maps is not None:
+			self.__polygon_map, hider_map_copy, seeker_map_copy = polygon_maps
+		else:
+			self.__polygon_map, hider_map_copy, seeker_map_copy = Simulator.create_polygon_maps(map_id, conf_options)
+		self.__visibility_table = None
+		if self.__percept_mode == 'snapped':
+			self.__visibility_table = visibilitytable.VisibilityTable(self.__polygon_map, self.__visibility_angle)
 
 		self.__log_flag = log_flag
 		self.__vis_flag = vis_flag
@@ -169,41 +205,45 @@ class Simulator(object):
 			self.__replay_output_file.write('num_seekers:' +  str(num_seekers) + '\n')
 			self.__replay_output_file.write('simulation:' + '\n')
 
-		hider_map_copy = gamemap.PolygonMap(map_id)
-		seeker_map_copy = gamemap.PolygonMap(map_id)
+		# AI setup, each team drawing the seeds of its members from its own seed
+		seeder = random.Random(seed)
+		hider_seed = None
+		seeker_seed = None
+		if seed is not None:
+			hider_seed = seeder.randint(0, 2**32 - 1)
+			seeker_seed = seeder.randint(0, 2**32 - 1)
 
-		# AI setup
 		if mode_hiders == 'random':
-			self.__hider_team = team.RandomTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta)
+			self.__hider_team = team.RandomTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, seed=hider_seed)
 		elif mode_hiders == 'bayesian':
-			self.__hider_team = team.BayesianTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta)
+			self.__hider_team = team.BayesianTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, seed=hider_seed)
 		elif mode_hiders == 'sbandit':
-			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, False, False)
+			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, False, False, seed=hider_seed)
 		elif mode_hiders == 'hm_sbandit':
-			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, True, False)
+			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, True, False, seed=hider_seed)
 		elif mode_hiders == 'hv_sbandit':
-			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, False, True)
+			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, False, True, seed=hider_seed)
 		elif mode_hiders == 'hmv_sbandit':
-			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, True, True)
+			self.__hider_team = team.UCBPassiveTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, True, True, seed=hider_seed)
 		elif mode_hiders == 'human':
-			self.__hider_team = team.HumanRandomTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta)
+			self.__hider_team = team.HumanRandomTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, seed=hider_seed)
 		elif mode_hiders == 'offset':
-			self.__hider_team = team.OffsetTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta)
+			self.__hider_team = team.OffsetTeam(agent.AgentType.Hider, num_hiders, hider_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, seed=hider_seed)
 
 		if mode_seekers == 'random':
-			self.__seeker_team = team.RandomTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta)
+			self.__seeker_team = team.RandomTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, seed=seeker_seed)
 		elif mode_seekers == 'sbandit':
-			self.__seeker_team = team.UCBAggressiveTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle)
+			self.__seeker_team = team.UCBAggressiveTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, seed=seeker_seed)
 		elif mode_seekers == 'coverage':
-			self.__seeker_team = team.UCBCoverageTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle)
+			self.__seeker_team = team.UCBCoverageTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, seed=seeker_seed)
 		elif mode_seekers == 'cc':
-			self.__seeker_team = team.UCBCoverageCommunicationTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle)
+			self.__seeker_team = team.UCBCoverageCommunicationTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, seed=seeker_seed)
 		elif mode_seekers == 'human':
-			self.__seeker_team = team.HumanRandomTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta)
+			self.__seeker_team = team.HumanRandomTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, seed=seeker_seed)
 		elif mode_seekers == 'wave':
-			self.__seeker_team = team.WaveTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle)
+			self.__seeker_team = team.WaveTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, seed=seeker_seed)
 		elif mode_seekers == 'trap':
-			self.__seeker_team = team.TrapTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle)
+			self.__seeker_team = team.TrapTeam(agent.AgentType.Seeker, num_seekers, seeker_map_copy, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle, seed=seeker_seed)
 
 		# Graphics setup
 		self.__window_width = self.__polygon_map.get_map_width()
@@ -223,9 +263,17 @@ class Simulator(object):
 		else:
 			self.__window = None
 
-		# Movers setup
-		self.__hiders = [Mover(self.__polygon_map, 0, 0, 0, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle) for i in range(num_hiders)]
-		self.__seekers = [Mover(self.__polygon_map, 0, 0, 0, self.__fps, self.__velocity, self.__fixed_time_quanta, self.__num_rays, self.__visibility_angle) for i in range(num_seekers)]
+		# Movers setup, the array engine only moving headless simulations
+		self.__mover_arrays = mover_arrays
+		self.__game = game
+		if self.__mover_arrays is None and self.__mover_engine == 'arrays' and not self.__vis_flag:
+			self.__mover_arrays = moverarrays.MoverArrays(self.__polygon_map, num_hiders, num_seekers, self.__fps, self.__velocity, self.__fixed_time_quanta)
+		if self.__mover_arrays is not None:
+			self.__hiders = [self.__mover_arrays.get_hider(i, game) for i in range(num_hiders)]
+			self.__seekers = [self.__mover_arrays.get_seeker(i, game) for i in range(num_seekers)]
+		else:
+			self.__hiders = [Mover(self.__polygon_map, 0, 0, 0, self.__fps, self.__velocity, self.__fixed_time_quanta) for i in range(num_hiders)]
+			self.__seekers = [Mover(self.__polygon_map, 0, 0, 0, self.__fps, self.__velocity, self.__fixed_time_quanta) for i in range(num_seekers)]
 
 		# Mover active list
 		self.__hiders_active = [True for i in range(num_hiders)]
@@ -382,6 +430,11 @@ class Simulator(object):
 		mover_active[mover_idx] = False
 		# movers[mover_idx].remove()
 		movers[mover_idx] = None
+		if self.__mover_arrays is not None:
+			if mover_type == agent.AgentType.Hider:
+				self.__mover_arrays.set_hider_inactive(mover_idx, self.__game)
+			elif mover_type == agent.AgentType.Seeker:
+				self.__mover_arrays.set_seeker_inactive(mover_idx, self.__game)
 		if self.__vis_flag:
 			self.__window.set_player_inactive(mover_type, mover_idx)
 
@@ -412,135 +465,161 @@ class Simulator(object):
 				self.__stats.update_hider_caught_time(graphics_idx, self.__steps)
 
 
-	def __get_visible_players(self, visibility_polygon, ignore_hiders, ignore_seekers):
-		hider_coords = []
-		hider_idxs = []
-		for i in range(self.__num_hiders):
-			if self.__hiders_active[i]:
-				if i in ignore_hiders:
-					continue
-				position = self.__hiders[i].get_current_coordinate()
-				if visibility_polygon.is_point_inside(position):
-					hider_coords.append(position)
-					hider_idxs.append(i)
-
-		seeker_coords = []
-		seeker_idxs = []
-		for i in range(self.__num_seekers):
-			if self.__seekers_active[i]:
-				if i in ignore_seekers:
-					continue
-				position = self.__seekers[i].get_current_coordinate()
-				if visibility_polygon.is_point_inside(position):
-					seeker_coords.append(position)
-					seeker_idxs.append(i)
-
-		return hider_coords, seeker_coords, hider_idxs, seeker_idxs
+	def __get_visible_players(self, visible, hider_idxs, seeker_idxs, ignore_hiders, ignore_seekers):
+		'''
+			Returns the visible players given a row of the visibility matrix,
+			whose columns are the active hiders followed by the active seekers.
+		'''
+		num_active_hiders = len(hider_idxs)
+		visible_hider_idxs = [idx for k, idx in enumerate(hider_idxs) if visible[k] and idx not in ignore_hiders]
+		visible_seeker_idxs = [idx for k, idx in enumerate(seeker_idxs) if visible[num_active_hiders + k] and idx not in ignore_seekers]
+		hider_coords = [self.__hiders[idx].get_current_coordinate() for idx in visible_hider_idxs]
+		seeker_coords = [self.__seekers[idx].get_current_coordinate() for idx in visible_seeker_idxs]
+		return hider_coords, seeker_coords, visible_hider_idxs, visible_seeker_idxs
 
 	def __update_percepts(self):
 		'''
-			Iterates over each players visibility region to check if any other 
-			player is visible or not, preparing the percept accordingly.
+			Checks which players lie in the visibility region of each player,
+			all at once in a visibility matrix, preparing the percepts
+			accordingly. In the analytic percept mode the matrix comes from
+			the fields of view instead of the visibility polygons, in the
+			snapped one from the visibility table.
 		'''
-		for i in range(self.__num_hiders):
-			if self.__hiders_active[i]:
-				hider = self.__hiders[i]
-				visibility_polygon = hider.get_visibility_polygon()
-				ignore_hiders = [i]
-				ignore_seekers = []
-				hider_coords, seeker_coords, hider_idxs, seeker_idxs = self.__get_visible_players(visibility_polygon, ignore_hiders, ignore_seekers)
-				# if hider_coords:
-				# 	print('Hider spotted:', hider_coords)
-				# if seeker_coords:
-				# 	print('Seeker spotted:', seeker_coords)
-				current_percept = percept.GraphicsPercept(hider_coords, seeker_coords, hider_idxs, seeker_idxs)
-				hider.set_percept(current_percept)
+		hider_idxs = [i for i in range(self.__num_hiders) if self.__hiders_active[i]]
+		seeker_idxs = [i for i in range(self.__num_seekers) if self.__seekers_active[i]]
+		movers = [self.__hiders[i] for i in hider_idxs] + [self.__seekers[i] for i in seeker_idxs]
+		if self.__percept_mode == 'analytic':
+			positions = [mover.get_current_coordinate() for mover in movers]
+			rotations = [mover.get_rotation() for mover in movers]
+			visibility_matrix = self.__polygon_map.get_fields_of_view_matrix(positions, rotations, self.__visibility_angle, positions)
+		elif self.__percept_mode == 'snapped':
+			positions = [mover.get_current_coordinate() for mover in movers]
+			rotations = [mover.get_rotation() for mover in movers]
+			visibility_matrix = self.__visibility_table.get_visibility_matrix(positions, rotations, positions)
+		else:
+			xs = [mover.get_current_coordinate().get_x() for mover in movers]
+			ys = [mover.get_current_coordinate().get_y() for mover in movers]
+			visibility_polygons = [mover.get_visibility_polygon() for mover in movers]
+			visibility_matrix = shapes.VisibilityPolygon.get_visibility_matrix(visibility_polygons, xs, ys)
 
-		for i in range(self.__num_seekers):
-			if self.__seekers_active[i]:
-				seeker = self.__seekers[i]
-				visibility_polygon = seeker.get_visibility_polygon()
-				ignore_hiders = []
-				ignore_seekers = [i]
-				hider_coords, seeker_coords, hider_idxs, seeker_idxs = self.__get_visible_players(visibility_polygon, ignore_hiders, ignore_seekers)
-				# if hider_coords:
-				# 	print('Hider spotted:', hider_coords)
-				# if seeker_coords:
-				# 	print('Seeker spotted:', seeker_coords)
-				current_percept = percept.GraphicsPercept(hider_coords, seeker_coords, hider_idxs, seeker_idxs)
-				seeker.set_percept(current_percept)
+		for k, i in enumerate(hider_idxs):
+			hider_coords, seeker_coords, visible_hider_idxs, visible_seeker_idxs = self.__get_visible_players(visibility_matrix[k], hider_idxs, seeker_idxs, [i], [])
+			current_percept = percept.GraphicsPercept(hider_coords, seeker_coords, visible_hider_idxs, visible_seeker_idxs)
+			self.__hiders[i].set_percept(current_percept)
+
+		for k, i in enumerate(seeker_idxs):
+			hider_coords, seeker_coords, visible_hider_idxs, visible_seeker_idxs = self.__get_visible_players(visibility_matrix[len(hider_idxs) + k], hider_idxs, seeker_idxs, [], [i])
+			current_percept = percept.GraphicsPercept(hider_coords, seeker_coords, visible_hider_idxs, visible_seeker_idxs)
+			self.__seekers[i].set_percept(current_percept)
 
 
+	def get_active_movers(self):
+		'''
+			Returns the active hiders followed by the active seekers
+		'''
+		movers = [self.__hiders[i] for i in range(self.__num_hiders) if self.__hiders_active[i]]
+		movers += [self.__seekers[i] for i in range(self.__num_seekers) if self.__seekers_active[i]]
+		return movers
+
+	def needs_visibility_polygons(self):
+		# Analytic and snapped percepts only need the polygons to draw or log
+		# them, headless runs without a replay log skipping them altogether
+		return self.__percept_mode == 'polygon' or self.__vis_flag or self.__log_flag
+
+	def __update_visibility_polygons(self):
+		'''
+			Computes the visibility polygons of all the active players with a
+			single batched query on the map.
+		'''
+		movers = self.get_active_movers()
+		positions = [mover.get_current_coordinate() for mover in movers]
+		rotations = [mover.get_rotation() for mover in movers]
+		visibility_polygons = self.__polygon_map.get_visibility_polygons_batch(positions, rotations, self.__num_rays, self.__visibility_angle)
+		for mover, visibility_polygon in zip(movers, visibility_polygons):
+			mover.set_visibility_polygon(visibility_polygon)
+
 	def __update_game(self, dt):
-		occupied_positions = []
-		hiders_pos_string = ''
+		if self.__mover_arrays is not None:
+			self.__mover_arrays.update(dt)
+		else:
+			self.__update_movers(dt)
+
+		if self.needs_visibility_polygons():
+			self.__update_visibility_polygons()
+
+	def __update_movers(self, dt):
+		# Keyed on a snapshot of the exact position, as obstruction means
+		# equal coordinates and the Coord of a mover changes as it moves
+		occupied_positions = set()
 		for i in range(self.__num_hiders):
 			if self.__hiders_active[i]:
 				self.__hiders[i].update(dt)
 				current_position = self.__hiders[i].get_current_coordinate()
 				collided = self.__polygon_map.check_obstacle_collision(current_position) or self.__polygon_map.check_boundary_collision(current_position)
-				obstructed = current_position in occupied_positions
+				position_key = current_position.get_tuple()
+				obstructed = position_key in occupied_positions
 
 				if collided or obstructed:
 					 self.__hiders[i].revert_configuration()
 				else:
-					occupied_positions.append(current_position)
-
-				if self.__log_flag:
-					x = self.__hiders[i].get_current_coordinate().get_x()
-					y = self.__hiders[i].get_current_coordinate().get_y()
-					act = self.__hiders[i].get_action()
-					if i != 0:
-						hiders_pos_string += '; '
-					hiders_pos_string += str(x) + ',' + str(y) + ',' + action.Action.action2string[act]
-					points_string = str(self.__hiders[i].get_visibility_polygon().get_points_tuple())[1:-1]
-					hiders_pos_string += '*' + points_string
+					occupied_positions.add(position_key)
 
-					# Updating the statistics
-					self.__stats.update_hider_path(i, self.__hiders[i].get_current_coordinate())
-
-			else:
-				if self.__log_flag:
-					if i != 0:
-						hiders_pos_string += '; '
-					hiders_pos_string += 'X*X'
-		# print(hiders_pos_string)
-
-		seekers_pos_string = ''
 		for i in range(self.__num_seekers):
 			if self.__seekers_active[i]:
 				self.__seekers[i].update(dt)
 				current_position = self.__seekers[i].get_current_coordinate()
 				collided = self.__polygon_map.check_obstacle_collision(current_position) or self.__polygon_map.check_boundary_collision(current_position)
-				obstructed = current_position in occupied_positions
+				position_key = current_position.get_tuple()
+				obstructed = position_key in occupied_positions
 				if collided or obstructed:
 					 self.__seekers[i].revert_configuration()
 				else:
-					occupied_positions.append(current_position)
+					occupied_positions.add(position_key)
+
+	def __log_game(self):
+		hiders_pos_string = ''
+		for i in range(self.__num_hiders):
+			if self.__hiders_active[i]:
+				x = self.__hiders[i].get_current_coordinate().get_x()
+				y = self.__hiders[i].get_current_coordinate().get_y()
+				act = self.__hiders[i].get_action()
+				if i != 0:
+					hiders_pos_string += '; '
+				hiders_pos_string += str(x) + ',' + str(y) + ',' + action.Action.action2string[act]
+				points_string = self.__hiders[i].get_visibility_polygon().get_points_string()
+				hiders_pos_string += '*' + points_string
+
+				# Updating the statistics
+				self.__stats.update_hider_path(i, self.__hiders[i].get_current_coordinate())
 
-				if self.__log_flag:
-					x = self.__seekers[i].get_current_coordinate().get_x()
-					y = self.__seekers[i].get_current_coordinate().get_y()
-					act = self.__seekers[i].get_action()
-					if i != 0:
-						seekers_pos_string += '; '
-					seekers_pos_string += str(x) + ',' + str(y) + ',' + action.Action.action2string[act]
-					points_string = str(self.__seekers[i].get_visibility_polygon().get_points_tuple())[1:-1]
-					seekers_pos_string += '*' + points_string
+			else:
+				if i != 0:
+					hiders_pos_string += '; '
+				hiders_pos_string += 'X*X'
+		# print(hiders_pos_string)
 
-					# Updating the statistics
-					self.__stats.update_seeker_path(i, self.__seekers[i].get_current_coordinate())
+		seekers_pos_string = ''
+		for i in range(self.__num_seekers):
+			if self.__seekers_active[i]:
+				x = self.__seekers[i].get_current_coordinate().get_x()
+				y = self.__seekers[i].get_current_coordinate().get_y()
+				act = self.__seekers[i].get_action()
+				if i != 0:
+					seekers_pos_string += '; '
+				seekers_pos_string += str(x) + ',' + str(y) + ',' + action.Action.action2string[act]
+				points_string = self.__seekers[i].get_visibility_polygon().get_points_string()
+				seekers_pos_string += '*' + points_string
 
+				# Updating the statistics
+				self.__stats.update_seeker_path(i, self.__seekers[i].get_current_coordinate())
 
 			else:
-				if self.__log_flag:
-					if i != 0:
-						seekers_pos_string += '; '
-					seekers_pos_string += 'X*X'
+				if i != 0:
+					seekers_pos_string += '; '
+				seekers_pos_string += 'X*X'
 		# print(seekers_pos_string)
-		if self.__log_flag:
-			self.__replay_output_file.write(hiders_pos_string+'\n')
-			self.__replay_output_file.write(seekers_pos_string+'\n')
+		self.__replay_output_file.write(hiders_pos_string+'\n')
+		self.__replay_output_file.write(seekers_pos_string+'\n')
 
 	def __update_mover_graphics_configuration(self, mover_type, mover_idx):
 		movers = self.__type2mover(mover_type)
@@ -657,34 +736,60 @@ class Simulator(object):
 
 
 	def __update_simulation(self, dt):
+		self.begin_step(dt)
+
+		# Update the position of players after incorporating the actions obtained
+		self.__update_game(dt)
+
+		return self.end_step()
+
+	def __lap(self, phase):
+		if self.__profiler is not None:
+			self.__profiler.lap(phase)
+
+	def begin_step(self, dt):
+		'''
+			First half of a step, up to the players being given the actions
+			and motions selected by the teams
+		'''
 		# update the time
 		# print('dt:', dt)
 		self.__total_time += dt
 		self.__steps += 1
+		if self.__profiler is not None:
+			self.__profiler.begin_tick()
 		
 		# extract percept from simulation layer and send to AI layer
 		self.__transfer_hider_percepts()
 		self.__transfer_seeker_percepts()
+		self.__lap('transfer_percepts')
 
 		# extract positions from simulation layer and send to AI layer
 		self.__transfer_hider_positions()
 		self.__transfer_seeker_positions()
+		self.__lap('transfer_positions')
 
 		# check if any hider is caught by a seeker and inform the AI layer
 		self.__check_hider_caught()
+		self.__lap('catch_check')
 
 		# If a human player is involved, pass the key pressed to AI layer
 		self.__handle_hider_keys()
 		self.__handle_seeker_keys()
+		self.__lap('keys')
 		
 		# update the states in ai layer so that they select actions
 		self.__hider_team.select_actions()
+		self.__lap('hider_select_actions')
 		self.__seeker_team.select_actions()
+		self.__lap('seeker_select_actions')
 
 		# update the states in ai layer so that they select wether they want 
 		# to move or not
 		self.__hider_team.select_motions()
+		self.__lap('hider_select_motions')
 		self.__seeker_team.select_motions()
+		self.__lap('seeker_select_motions')
 
 		# extract actions from ai layer and send it to simulation layer
 		self.__transfer_hider_actions()
@@ -693,12 +798,21 @@ class Simulator(object):
 		# extract actions from ai layer and send it to simulation layer
 		self.__transfer_hider_motions()
 		self.__transfer_seeker_motions()
-			
-		# Update the position of players after incorporating the actions obtained
-		self.__update_game(dt)
+		self.__lap('transfer_actions')
+
+	def end_step(self):
+		'''
+			Second half of a step, once the players have moved and have their
+			visibility polygons. Returns False when the game is over.
+		'''
+		self.__lap('update_game')
+		if self.__log_flag:
+			self.__log_game()
+		self.__lap('log')
 
 		# Update the percepts obtained after incorporating the new position
 		self.__update_percepts()
+		self.__lap('update_percepts')
 
 		# If a human player is involved, handle selective show of players
 		self.__enable_seeker_show()
@@ -708,13 +822,21 @@ class Simulator(object):
 		if self.__vis_flag:
 			self.__update_graphics_configuration()
 			self.__update_graphics_visibility()
+		self.__lap('graphics')
+		if self.__profiler is not None:
+			self.__profiler.end_tick()
 
-		if self.__num_caught == self.__num_hiders:
+		out_of_steps = self.__max_steps is not None and self.__steps >= self.__max_steps
+		if self.__num_caught == self.__num_hiders or out_of_steps:
 			print('Total steps:', self.__steps)
-			print('All hiders caught')
+			if self.__num_caught == self.__num_hiders:
+				print('All hiders caught')
+			else:
+				print('Step limit reached')
 			self._total_step_times.append(self.__steps)
 			# self.__stats.print_statistic()
 			self.__stats.write_statistic()
+			self.write_profile()
 			if self.__log_flag:
 				print()
 				print('## Closing log file')
@@ -725,18 +847,34 @@ class Simulator(object):
 		else:
 			return True
 
-	def simulate(self):
-		# pyglet.gl.glClearColor(255,255,255,0)
+	def write_profile(self):
+		'''
+			Writes the ticks profiled so far, once per game: at its end, or
+			when it is shut down before, e.g. by closing its window
+		'''
+		if self.__profiler is None:
+			return
+		self.__profiler.write('hs_' + str(self.__sim_turn) + '_')
+		self.__profiler = None
+
+	def set_openings(self):
 		self.__set_hider_openings()
 		self.__set_seeker_openings()
+
+	def simulate(self):
+		# pyglet.gl.glClearColor(255,255,255,0)
+		self.set_openings()
 		if self.__vis_flag:
 			self.__update_graphics_configuration()
-		if self.__vis_flag:
-			pyglet.clock.schedule_interval(self.__update_simulation, 1/self.__fps)
-			pyglet.app.run()
-		else:
-			while(True):
-				if not self.__update_simulation(1/self.__fps):
-					break
+		try:
+			if self.__vis_flag:
+				pyglet.clock.schedule_interval(self.__update_simulation, 1/self.__fps)
+				pyglet.app.run()
+			else:
+				while(True):
+					if not self.__update_simulation(1/self.__fps):
+						break
+		finally:
+			self.write_profile()
 
 		
\ No newline at end of file
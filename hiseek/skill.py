@@ -13,6 +13,8 @@ class Skill(object):
 		self._agent_type = agent_type
 		self._team = team
 		self._map_manager = map_manager
+		self._random = random.Random(team.spawn_seed())
+		self._np_random = np.random.RandomState(team.spawn_seed())
 
 class RandomOpeningSkill(Skill):
 
@@ -51,7 +53,7 @@ class RandomOpeningSkill(Skill):
 			for j in range(self._team.get_num_rankers(i)):
 				found_position = False
 				while not found_position:
-					position = coord.Coord(random.randint(0, gamemap.get_map_width()), random.randint(0, gamemap.get_map_height()))
+					position = coord.Coord(self._random.randint(0, gamemap.get_map_width()), self._random.randint(0, gamemap.get_map_height()))
 					if not self.__check_within_obstacle(position) and not self.__check_already_occupied(position):
 						self.__opening_positions[(i, j)] = position
 						found_position = True
@@ -108,11 +110,11 @@ class UCBOpeningSkill(Skill):
 		num_strategic_points = self._map_manager.get_num_strategic_points()
 		if num_agents <= num_strategic_points:
 			if self.__randomOpening:
-				opening_points = np.random.choice(num_strategic_points, num_agents, replace=False)
+				opening_points = self._np_random.choice(num_strategic_points, num_agents, replace=False)
 			else:
 				opening_points = self.__macro_UCB.get_greatest_actions(num_agents)
 		else:
-			opening_points = np.random.choice(num_strategic_points, num_agents)
+			opening_points = self._np_random.choice(num_strategic_points, num_agents)
 		st_idx = 0
 		for i in reversed(range(max_rank)):
 			for j in range(self._team.get_num_rankers(i)):
@@ -148,7 +150,7 @@ class OffsetOpeningSkill(Skill):
 
 	def __set_opening(self):
 		num_offset_obstacles = self._map_manager.get_count_offset_obstacles()
-		obstacles_ids = np.random.permutation(num_offset_obstacles)
+		obstacles_ids = self._np_random.permutation(num_offset_obstacles)
 		obs_idx = 0
 		max_rank = self._team.get_ranks()
 		for i in reversed(range(max_rank)):
@@ -159,6 +161,6 @@ class OffsetOpeningSkill(Skill):
 				self.__opening_obstacles[(i, j)] = obstacle
 
 				num_offset_points = obstacle.get_count_offset_points()
-				pnt_id = random.randint(0, num_offset_points-1)
+				pnt_id = self._random.randint(0, num_offset_points-1)
 				position = obstacle.get_offset_point(pnt_id)
 				self.__opening_positions[(i, j)] = position
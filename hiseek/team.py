@@ -1,5 +1,6 @@
 from abc import ABCMeta, abstractmethod
 import copy
+import random
 
 import message
 import agent
@@ -20,7 +21,7 @@ class Team(object):
 	# rank 2 means there are higher level players who control lower level players 
 	# and so on
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta):
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed=None):
 		'''
 			_members is a list of lists, each list contains members
 			of the particular rank which corresponds to the index at which
@@ -38,7 +39,18 @@ class Team(object):
 		self._members = None # which type of members to recruit ?
 		self._map_managers = None # which map manager to assign to each hierarchy level ?
 		self._active = None # a list denoting which of the agents are still in the game
+		self.__seed = seed
+		self.__seeder = random.Random(seed)
 	
+	def spawn_seed(self):
+		'''
+			Returns the seed of a member, skill or UCB of the team, None if
+			the team is not seeded
+		'''
+		if self.__seed is None:
+			return None
+		return self.__seeder.randint(0, 2**32 - 1)
+
 	def create_agent_messenger(self, agent_id):
 		return self._team_messenger.create_agent_messenger(agent_id)
 
@@ -202,8 +214,8 @@ class RandomTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta):
-		super(RandomTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed=None):
+		super(RandomTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -212,6 +224,7 @@ class RandomTeam(Team):
 
 		# assign a basic map manager to the only level
 		map_manager = mapmanager.BasicMapManager(self._mapworld, self._fps, self._velocity)
+		map_manager.set_seed(self.spawn_seed())
 		self._map_managers.append(map_manager)
 
 		# recruit the commander of the random team
@@ -239,8 +252,8 @@ class BayesianTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta):
-		super(BayesianTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed=None):
+		super(BayesianTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -249,6 +262,7 @@ class BayesianTeam(Team):
 
 		# assign a basic map manager to the only level
 		map_manager = mapmanager.BasicMapManager(self._mapworld, self._fps, self._velocity)
+		map_manager.set_seed(self.spawn_seed())
 		self._map_managers.append(map_manager)
 
 		# recruit the commander of the random team
@@ -278,8 +292,8 @@ class UCBAggressiveTeam(Team):
 
 	ranks = 1
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle):
-		super(UCBAggressiveTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, seed=None):
+		super(UCBAggressiveTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -291,6 +305,7 @@ class UCBAggressiveTeam(Team):
 
 		# assign a basic map manager to the only level
 		map_manager = mapmanager.StrategicPointsMapManager(self._mapworld, self._fps, self._velocity)
+		map_manager.set_seed(self.spawn_seed())
 
 		self._map_managers.append(map_manager)
 
@@ -324,8 +339,8 @@ class UCBPassiveTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, handicap_movement=False, handicap_visibility=False):		
-		super(UCBPassiveTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, handicap_movement=False, handicap_visibility=False, seed=None):		
+		super(UCBPassiveTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -343,9 +358,10 @@ class UCBPassiveTeam(Team):
 		self.__visibility_angle = visibility_angle
 
 		map_manager = mapmanager.StrategicPointsMapManager(self._mapworld, self._fps, self._velocity)
+		map_manager.set_seed(self.spawn_seed())
 		self._map_managers.append(map_manager)
 		num_strategic_points = self._map_managers[0].get_num_strategic_points()
-		macro_UCB = ucb.UCB(num_strategic_points)
+		macro_UCB = ucb.UCB(num_strategic_points, seed=self.spawn_seed())
 		offset = self._map_managers[0].get_offset()
 		max_cells_visible = self._map_managers[0].get_max_cells_visible()
 
@@ -353,13 +369,9 @@ class UCBPassiveTeam(Team):
 			avg_val = 0
 			if not self.__handicap_visibility:
 				strategic_point = self._map_managers[0].get_strategic_point(i)
-				vpolygon = self._map_managers[0].get_360_visibility_polygon(strategic_point, self.__num_rays)
 				common_cells = self._map_managers[0].get_nearby_visibility_cells(strategic_point)
-				visible_cells = 0
-				for a, b in common_cells:
-					coord_obs = coord.Coord(a * offset, b * offset)
-					if vpolygon.is_point_inside(coord_obs):
-						visible_cells += 1
+				coords_obs = [coord.Coord(a * offset, b * offset) for a, b in common_cells]
+				visible_cells = sum(self._map_managers[0].get_360_visible_flags(strategic_point, coords_obs, self.__num_rays))
 				if visible_cells == 0:
 					visible_cells = 1
 				avg_val = max_cells_visible * 1.0/ visible_cells
@@ -397,8 +409,8 @@ class UCBCoverageTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle):
-		super(UCBCoverageTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, seed=None):
+		super(UCBCoverageTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -411,6 +423,7 @@ class UCBCoverageTeam(Team):
 		# assign a basic map manager to the only level
 		# map_manager = mapmanager.StrategicPointsMapManager(self._mapworld, self._fps, self._velocity)
 		map_manager = mapmanager.CoveragePointsMapManager(self._mapworld, self._fps, self._velocity, self.__num_rays, self.__visibility_angle)
+		map_manager.set_seed(self.spawn_seed())
 
 		self._map_managers.append(map_manager)
 
@@ -445,8 +458,8 @@ class UCBCoverageCommunicationTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle):
-		super(UCBCoverageCommunicationTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, seed=None):
+		super(UCBCoverageCommunicationTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -458,6 +471,7 @@ class UCBCoverageCommunicationTeam(Team):
 
 		# assign a basic map manager to the only level
 		map_manager = mapmanager.CoveragePointsMapManager(self._mapworld, self._fps, self._velocity, self.__num_rays, self.__visibility_angle)
+		map_manager.set_seed(self.spawn_seed())
 
 		self._map_managers.append(map_manager)
 
@@ -497,8 +511,8 @@ class HumanRandomTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta):
-		super(HumanRandomTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed=None):
+		super(HumanRandomTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -508,6 +522,7 @@ class HumanRandomTeam(Team):
 
 		# assign a basic map manager to the only level
 		map_manager = mapmanager.BasicMapManager(self._mapworld, self._fps, self._velocity)
+		map_manager.set_seed(self.spawn_seed())
 		self._map_managers.append(map_manager)
 
 		# recruit the commander of the random team
@@ -563,8 +578,8 @@ class OffsetTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta):
-		super(OffsetTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed=None):
+		super(OffsetTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -573,6 +588,7 @@ class OffsetTeam(Team):
 
 		# assign a basic map manager to the only level
 		map_manager = mapmanager.OffsetPointsMapManager(self._mapworld, self._fps, self._velocity)
+		map_manager.set_seed(self.spawn_seed())
 		self._map_managers.append(map_manager)
 
 		# recruit the commander of the random team
@@ -602,8 +618,8 @@ class WaveTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle):
-		super(WaveTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, seed=None):
+		super(WaveTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -614,6 +630,7 @@ class WaveTeam(Team):
 		self.__visibility_angle = visibility_angle
 
 		map_manager = mapmanager.WaveMapManager(self._mapworld, self._fps, self._velocity, self.__num_rays, self.__visibility_angle)
+		map_manager.set_seed(self.spawn_seed())
 		reqd_min_seekers = map_manager.get_min_reqd_seekers()
 
 		num_hiker_components = map_manager.get_num_components()
@@ -660,8 +677,8 @@ class TrapTeam(Team):
 
 	ranks = 2
 
-	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle):
-		super(TrapTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta)
+	def __init__(self, agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, num_rays, visibility_angle, seed=None):
+		super(TrapTeam, self).__init__(agent_type, num_agents, mapworld, fps, velocity, fixed_time_quanta, seed)
 
 		# prepare a rank 1 hierarchy member list and map managers
 		self._map_managers = [] # one map manager for one level
@@ -674,6 +691,7 @@ class TrapTeam(Team):
 
 		##### NEW
 		map_manager = mapmanager.TrapMapManager(self._mapworld, self._fps, self._velocity, self.__num_rays, self.__visibility_angle)
+		map_manager.set_seed(self.spawn_seed())
 		reqd_min_seekers = map_manager.get_min_reqd_seekers()
 		num_hiker_components = map_manager.get_num_components()
 		print('* Hiker Info *')
@@ -0,0 +1,77 @@
+import timeit
+
+import numpy as np
+
+class TickProfiler(object):
+	'''
+		Records the wall time spent in each phase of every tick of a
+		simulation.
+
+		A tick starts with begin_tick, each lap(phase) then charges the time
+		elapsed since the previous mark to the phase, and end_tick stores
+		the tick. The phase update_game covers everything between the two
+		halves of a step, which for the games stepped together by
+		VecSimulator includes the work done for the other games.
+	'''
+
+	PHASES = ['transfer_percepts', 'transfer_positions', 'catch_check', 'keys', 'hider_select_actions', 'seeker_select_actions', 'hider_select_motions', 'seeker_select_motions', 'transfer_actions', 'update_game', 'log', 'update_percepts', 'graphics']
+
+	def __init__(self, phases=None):
+		if phases is None:
+			phases = TickProfiler.PHASES
+		self.__phases = list(phases)
+		self.__phase_ids = dict((phase, i) for i, phase in enumerate(self.__phases))
+		self.__ticks = []
+		self.__tick = None
+		self.__last = 0
+
+	def get_phases(self):
+		return self.__phases
+
+	def begin_tick(self):
+		self.__tick = [0.0 for phase in self.__phases]
+		self.__last = timeit.default_timer()
+
+	def lap(self, phase):
+		now = timeit.default_timer()
+		self.__tick[self.__phase_ids[phase]] += now - self.__last
+		self.__last = now
+
+	def end_tick(self):
+		self.__ticks.append(self.__tick)
+
+	def get_times(self):
+		'''
+			Returns a (num_ticks, num_phases) array of the times in seconds
+		'''
+		return np.array(self.__ticks, dtype=float).reshape(-1, len(self.__phases))
+
+	def get_summary(self):
+		times = self.get_times()
+		total = times.sum()
+		lines = ['%-24s %10s %10s %10s %7s' % ('phase', 'total(s)', 'mean(ms)', 'max(ms)', 'share')]
+		for i, phase in enumerate(self.__phases):
+			column = times[:, i]
+			mean = column.mean() if column.shape[0] != 0 else 0
+			peak = column.max() if column.shape[0] != 0 else 0
+			share = column.sum() / total if total != 0 else 0
+			lines.append('%-24s %10.3f %10.3f %10.3f %6.1f%%' % (phase, column.sum(), 1000 * mean, 1000 * peak, 100 * share))
+		lines.append('%-24s %10.3f %10s %10s %7s' % ('ticks: ' + str(times.shape[0]), total, '', '', ''))
+		return '\n'.join(lines)
+
+	def write(self, file_prefix):
+		'''
+			Prints the summary table and writes it to file_prefix.profile, the
+			times of every tick going to file_prefix.profile.csv and
+			file_prefix.profile.npz
+		'''
+		summary = self.get_summary()
+		print(summary)
+		f = open(file_prefix + '.profile', 'w')
+		f.write(summary + '\n')
+		f.close()
+
+		times = self.get_times()
+		ticks = np.arange(times.shape[0])[:, None]
+		np.savetxt(file_prefix + '.profile.csv', np.hstack((ticks, times)), delimiter=',', header='tick,' + ','.join(self.__phases), comments='', fmt=['%d'] + ['%.9f'] * len(self.__phases))
+		np.savez(file_prefix + '.profile.npz', times=times, phases=np.array(self.__phases))
@@ -1,18 +1,17 @@
 import math
-import time
 
 import numpy as np
 
 class UCB(object):
 
-	def __init__(self, num_actions, alpha=0.1):
+	def __init__(self, num_actions, alpha=0.1, seed=None):
 		'''
 			u_cap[i] : Mean emprirical reward associated with each strategic point
 			N[i]: #Time strategic point i has been choosen
 			t: #Total number of time steps/#Total number of choices made
 			UCB[i]: Upper Confidence Bound associated with each strategic point
 		'''
-		np.random.seed(int(time.time()))
+		self.__np_random = np.random.RandomState(seed)
 		self.__num_actions = num_actions
 		self.__u_cap = [0 for i in range(self.__num_actions)]
 		self.__N = [1 for i in range(self.__num_actions)]
@@ -56,7 +55,7 @@ class UCB(object):
 		actions =  np.argwhere(self.__UCB == np.amax(self.__UCB))
 		actions = actions.flatten()
 		# print('Max actions:', actions)
-		action = np.random.choice(actions)
+		action = self.__np_random.choice(actions)
 		# print('Action picked:', action)
 		return action
 
@@ -0,0 +1,78 @@
+import simulator
+import moverarrays
+
+class VecSimulator(object):
+	'''
+		Steps several independent games on the same map in lockstep.
+
+		The games share the maps, so the map managers of all their teams
+		share the loaded artifacts, and the movers of all the games are kept
+		in a single MoverArrays. Each step the teams of every game select
+		their actions, then all the movers are moved together and the
+		visibility polygons of all the games are computed in one batched
+		query. Games over drop out while the others carry on.
+	'''
+
+	def __init__(self, mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, conf_options, sim_turns, seeds=None, output_files=None):
+		self.__num_games = len(sim_turns)
+		self.__fps = conf_options.get_fps()
+		if seeds is None:
+			seeds = [None for i in range(self.__num_games)]
+		log_flag = output_files is not None
+		if output_files is None:
+			output_files = [None for i in range(self.__num_games)]
+
+		self.__polygon_maps = simulator.Simulator.create_polygon_maps(map_id, conf_options)
+		self.__polygon_map = self.__polygon_maps[0]
+		self.__num_rays = conf_options.get_num_rays()
+		self.__visibility_angle = conf_options.get_visibility_angle()
+		self.__mover_arrays = moverarrays.MoverArrays(self.__polygon_map, num_hiders, num_seekers, self.__fps, conf_options.get_velocity(), conf_options.get_fixed_time_quanta(), self.__num_games)
+
+		self.__total_step_times = [[] for i in range(self.__num_games)]
+		self.__simulators = []
+		for k in range(self.__num_games):
+			print('*** New game ***', sim_turns[k])
+			sim = simulator.Simulator(mode_hiders, mode_seekers, num_hiders, num_seekers, map_id, None, output_files[k], conf_options, log_flag, False, self.__total_step_times[k], sim_turns[k], seed=seeds[k], polygon_maps=self.__polygon_maps, mover_arrays=self.__mover_arrays, game=k)
+			self.__simulators.append(sim)
+
+	def get_num_games(self):
+		return self.__num_games
+
+	def __update_visibility_polygons(self, simulators):
+		movers = []
+		for sim in simulators:
+			if sim.needs_visibility_polygons():
+				movers += sim.get_active_movers()
+		positions = [mover.get_current_coordinate() for mover in movers]
+		rotations = [mover.get_rotation() for mover in movers]
+		visibility_polygons = self.__polygon_map.get_visibility_polygons_batch(positions, rotations, self.__num_rays, self.__visibility_angle)
+		for mover, visibility_polygon in zip(movers, visibility_polygons):
+			mover.set_visibility_polygon(visibility_polygon)
+
+	def simulate(self):
+		'''
+			Plays all the games to the end and returns their numbers of
+			steps, in the order of the games
+		'''
+		dt = 1/self.__fps
+		for sim in self.__simulators:
+			sim.set_openings()
+		running = list(range(self.__num_games))
+		try:
+			while len(running) != 0:
+				simulators = [self.__simulators[k] for k in running]
+				for sim in simulators:
+					sim.begin_step(dt)
+				self.__mover_arrays.update(dt)
+				self.__update_visibility_polygons(simulators)
+				still_running = []
+				for k, sim in zip(running, simulators):
+					if sim.end_step():
+						still_running.append(k)
+					else:
+						self.__mover_arrays.set_game_inactive(k)
+				running = still_running
+		finally:
+			for k in running:
+				self.__simulators[k].write_profile()
+		return [step_times[-1] for step_times in self.__total_step_times]
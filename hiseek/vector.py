@@ -2,12 +2,33 @@ import numpy as np
 import math
 
 class Vector2D(object):
+
+	__slots__ = ('__x', '__y', '__magnitude')
+
 	def __init__(self, x, y):
 		self.__x = x
 		self.__y = y
 
 		self.__magnitude = math.sqrt(self.__x * self.__x + self.__y * self.__y)
 
+	def __getstate__(self):
+		return {'_Vector2D__x': self.__x, '_Vector2D__y': self.__y, '_Vector2D__magnitude': self.__magnitude}
+
+	def __setstate__(self, state):
+		for name, value in state.items():
+			setattr(self, name, value)
+
+	def __eq__(self, other):
+		return isinstance(other, Vector2D) and self.__x == other.__x and self.__y == other.__y
+
+	def __ne__(self, other):
+		return not self.__eq__(other)
+
+	def __hash__(self):
+		# Hashed on the value, which normalize and set_components change: a
+		# vector must not be modified while it is a key
+		return hash((self.__x, self.__y))
+
 	def get_x_component(self):
 		return self.__x
 
@@ -45,5 +66,13 @@ class Vector2D(object):
 		dot_product = self.__x * other.__x + self.__y * other.__y
 		return dot_product
 
+	def set_components(self, x, y):
+		'''
+			Overwrites the vector in place instead of allocating a new one
+		'''
+		self.__x = x
+		self.__y = y
+		self.__magnitude = math.sqrt(self.__x * self.__x + self.__y * self.__y)
+
 	def multiply_scalar(self, scalar):
 		return Vector2D(scalar * self.__x, scalar * self.__y)
@@ -0,0 +1,168 @@
+import os
+import sys
+import math
+
+import numpy as np
+
+import gamemap
+import coord
+import action
+
+class VisibilityTable(object):
+	'''
+		Precomputed visibility of a map for snapped poses.
+
+		The viewer is snapped to the closest point (row * offset, col * offset)
+		of the map grid (the row running along x, as in the map managers) and
+		its rotation to the closest of the action.ROTATION headings. For each
+		such pose the table stores which grid points of the window of
+		(2 * half_cells + 1)**2 points centred on the viewer are seen, as the
+		packed bits of a boolean window. A target is seen if its snapped grid
+		point is, the viewer always seeing its own grid point.
+
+		Grid points inside the obstacles have no window of their own, the
+		viewers and targets snapping to them being moved to the closest free
+		grid point instead, as players next to a wall often do.
+
+		The table is stored in a .npy file and memory mapped, so a lookup only
+		reads the bytes of the poses it touches.
+	'''
+
+	def __init__(self, polygon_map, visibility_angle, offset=10, redo=False):
+		self.__polygon_map = polygon_map
+		self.__visibility_angle = visibility_angle
+		self.__offset = offset
+		self.__num_rows = int(math.ceil((polygon_map.get_map_width() * 1.0)/offset))
+		self.__num_cols = int(math.ceil((polygon_map.get_map_height() * 1.0)/offset))
+		self.__num_directions = len(action.ROTATION)
+		self.__rotations = np.array(action.ROTATION, dtype=float)
+
+		left, bottom, right, top = polygon_map.get_bbox(coord.Coord(0, 0)).get_rtree_bbox()
+		self.__half_cells = int((right - left) / 2) // offset
+		self.__window_length = 2 * self.__half_cells + 1
+		self.__window_size = self.__window_length**2
+
+		map_name = polygon_map.get_map_name().split('.')[0]
+		self.__file_name = map_name + '.vistable_' + str(visibility_angle) + '_' + str(offset) + '.npy'
+		if redo or not os.path.isfile(self.__file_name):
+			print('Building visibility table', self.__file_name)
+			self.__build()
+		print('Loading visibility table', self.__file_name)
+		self.__table = np.load(self.__file_name, mmap_mode='r')
+		assert(self.__table.shape[:3] == (self.__num_rows, self.__num_cols, self.__num_directions))
+		self.__free_rows, self.__free_cols = self.__find_closest_free_points()
+
+	def get_file_name(self):
+		return self.__file_name
+
+	def get_offset(self):
+		return self.__offset
+
+	def get_half_cells(self):
+		return self.__half_cells
+
+	def __build(self):
+		num_bytes = (self.__window_size + 7) // 8
+		table = np.lib.format.open_memmap(self.__file_name, mode='w+', dtype=np.uint8, shape=(self.__num_rows, self.__num_cols, self.__num_directions, num_bytes))
+
+		window = np.arange(-self.__half_cells, self.__half_cells + 1)
+		window_rows, window_cols = np.meshgrid(window, window, indexing='ij')
+		window_rows = window_rows.ravel()
+		window_cols = window_cols.ravel()
+		centre = self.__window_size // 2
+
+		for i in range(self.__num_rows):
+			sys.stdout.write('\rAnalyzing row %d of %d' % (i + 1, self.__num_rows))
+			sys.stdout.flush()
+			for j in range(self.__num_cols):
+				position = coord.Coord(i * self.__offset, j * self.__offset)
+				if self.__polygon_map.check_obstacle_collision(position):
+					continue
+				targets = [coord.Coord((i + a) * self.__offset, (j + b) * self.__offset) for a, b in zip(window_rows.tolist(), window_cols.tolist())]
+				# Every heading shares the same line of sight tests
+				seen = np.tile(self.__polygon_map.get_fields_of_view_matrix([position], [0], 180, targets), (self.__num_directions, 1))
+				if self.__visibility_angle < 180:
+					seen &= self.__polygon_map.get_fields_of_view_matrix([position] * self.__num_directions, action.ROTATION, self.__visibility_angle, targets)
+				seen[:, centre] = True
+				table[i, j] = np.packbits(seen, axis=1)
+		sys.stdout.write('\n')
+		table.flush()
+		del table
+
+	def __find_closest_free_points(self):
+		'''
+			Returns the row and col of the closest free grid point of every
+			grid point, a free point being its own. The free points are the
+			ones whose window has its centre bit set.
+		'''
+		centre = self.__window_size // 2
+		free = (self.__table[:, :, 0, centre // 8] >> (7 - centre % 8)) & 1 == 1
+		free_rows, free_cols = np.meshgrid(np.arange(self.__num_rows), np.arange(self.__num_cols), indexing='ij')
+		if not np.any(free):
+			return free_rows, free_cols
+		blocked_rows, blocked_cols = np.nonzero(~free)
+
+		# Offsets tried closest first until every blocked point has a free one
+		radius = max(self.__num_rows, self.__num_cols)
+		d_rows, d_cols = np.meshgrid(np.arange(-radius, radius + 1), np.arange(-radius, radius + 1), indexing='ij')
+		order = np.argsort((d_rows**2 + d_cols**2).ravel(), kind='mergesort')
+		for d_row, d_col in zip(d_rows.ravel()[order].tolist(), d_cols.ravel()[order].tolist()):
+			if blocked_rows.shape[0] == 0:
+				break
+			rows = blocked_rows + d_row
+			cols = blocked_cols + d_col
+			inside = (rows >= 0) & (rows < self.__num_rows) & (cols >= 0) & (cols < self.__num_cols)
+			found = inside.copy()
+			found[inside] = free[rows[inside], cols[inside]]
+			free_rows[blocked_rows[found], blocked_cols[found]] = rows[found]
+			free_cols[blocked_rows[found], blocked_cols[found]] = cols[found]
+			blocked_rows = blocked_rows[~found]
+			blocked_cols = blocked_cols[~found]
+		return free_rows, free_cols
+
+	def __snap(self, positions):
+		xs = np.array([position.get_x() for position in positions], dtype=float)
+		ys = np.array([position.get_y() for position in positions], dtype=float)
+		rows = np.clip(np.rint(xs / self.__offset).astype(int), 0, self.__num_rows - 1)
+		cols = np.clip(np.rint(ys / self.__offset).astype(int), 0, self.__num_cols - 1)
+		return self.__free_rows[rows, cols], self.__free_cols[rows, cols]
+
+	def __get_directions(self, rotations):
+		differences = np.array(rotations, dtype=float)[:, None] - self.__rotations[None, :]
+		return np.argmin(np.abs(np.mod(differences + 180, 360) - 180), axis=1)
+
+	def get_visibility_matrix(self, positions, rotations, targets):
+		'''
+			Returns a boolean matrix whose (i, j) entry tells whether a viewer
+			at positions[i] facing rotations[i] sees targets[j], the poses
+			and the targets being snapped to the grid.
+		'''
+		matrix = np.zeros((len(positions), len(targets)), dtype=bool)
+		if len(positions) == 0 or len(targets) == 0:
+			return matrix
+		rows, cols = self.__snap(positions)
+		directions = self.__get_directions(rotations)
+		target_rows, target_cols = self.__snap(targets)
+
+		d_rows = target_rows[None, :] - rows[:, None]
+		d_cols = target_cols[None, :] - cols[:, None]
+		in_window = (np.abs(d_rows) <= self.__half_cells) & (np.abs(d_cols) <= self.__half_cells)
+		viewers, seen = np.nonzero(in_window)
+		bits = (d_rows[viewers, seen] + self.__half_cells) * self.__window_length + d_cols[viewers, seen] + self.__half_cells
+		values = self.__table[rows[viewers], cols[viewers], directions[viewers], bits // 8]
+		matrix[viewers, seen] = (values >> (7 - bits % 8)) & 1 == 1
+		return matrix
+
+# SampleInput: python visibilitytable.py 5 45 10
+
+def main():
+	map_id = int(sys.argv[1])
+	visibility_angle = int(sys.argv[2])
+	offset = 10
+	if len(sys.argv) > 3:
+		offset = int(sys.argv[3])
+	polygon_map = gamemap.PolygonMap(map_id)
+	VisibilityTable(polygon_map, visibility_angle, offset, True)
+
+if __name__ == '__main__':
+	main()
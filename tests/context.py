@@ -2,6 +2,14 @@
 
 import sys
 import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# The modules import each other by name and read the map files from the
+# working directory
+hiseek_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'hiseek'))
+sys.path.insert(0, hiseek_dir)
 
-import sample
+import config
+import coord
+import environment
+import gamemap
+import shapes
+import ucb
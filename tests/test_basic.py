@@ -1,16 +0,0 @@
-# -*- coding: utf-8 -*-
-
-from .context import sample
-
-import unittest
-
-
-class BasicTestSuite(unittest.TestCase):
-    """Basic test cases."""
-
-    def test_absolute_truth_and_meaning(self):
-        assert True
-
-
-if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
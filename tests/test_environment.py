@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from .context import hiseek_dir, config, coord, environment, shapes
+
+import os
+import unittest
+
+import numpy as np
+
+
+class EnvironmentTestSuite(unittest.TestCase):
+    """Reset and step of the headless environment."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(hiseek_dir)
+        conf_options = config.Configuration(60, 600, True, 10, 45, 0, False, 'dark_hider.png', 'dark_seeker.png', False, False, False, False, percept_mode='analytic')
+        self.env = environment.Environment(5, 2, 3, conf_options, max_steps=20, raster_size=5)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_shapes(self):
+        obs = self.env.reset(seed=3)
+        self.assertEqual(obs['poses'].shape, (5, 3))
+        self.assertEqual(obs['active'].shape, (5,))
+        self.assertEqual(obs['visible'].shape, (5, 5))
+        self.assertEqual(obs['raster'].shape, (5, 5, 5))
+        self.assertTrue(obs['active'].all())
+        actions = np.zeros(self.env.get_num_players(), dtype=int)
+        obs, rewards, done, info = self.env.step(actions)
+        self.assertEqual(obs['poses'].shape, (5, 3))
+        self.assertEqual(rewards.shape, (5,))
+        self.assertEqual(info['steps'], 1)
+
+    def test_seeded_runs(self):
+        runs = []
+        for run in range(2):
+            obs = self.env.reset(seed=3)
+            random = np.random.RandomState(4)
+            poses = [obs['poses'].copy()]
+            rasters = [obs['raster'].copy()]
+            done = False
+            while not done:
+                actions = random.randint(0, self.env.get_num_actions(), self.env.get_num_players())
+                obs, rewards, done, info = self.env.step(actions)
+                poses.append(obs['poses'].copy())
+                rasters.append(obs['raster'].copy())
+            runs.append((np.array(poses), np.array(rasters)))
+        self.assertTrue(np.array_equal(runs[0][0], runs[1][0]))
+        self.assertTrue(np.array_equal(runs[0][1], runs[1][1]))
+
+    def test_raster(self):
+        obs = self.env.reset(seed=3)
+        polygon_map = self.env.get_map()
+        idxs = np.nonzero(obs['active'])[0]
+        xs = obs['poses'][idxs, 0]
+        ys = obs['poses'][idxs, 1]
+        positions = [coord.Coord(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+        polygons = polygon_map.get_visibility_polygons_batch(positions, obs['poses'][idxs, 2].tolist(), 10, 45)
+        grid = (np.arange(5) - 2) * 10.0
+        raster_xs = xs[:, None] + np.repeat(grid, 5)[None, :]
+        raster_ys = ys[:, None] + np.tile(grid, 5)[None, :]
+        paired = shapes.VisibilityPolygon.get_paired_visibility_matrix(polygons, raster_xs, raster_ys)
+        for i, polygon in enumerate(polygons):
+            row = shapes.VisibilityPolygon.get_visibility_matrix([polygon], raster_xs[i], raster_ys[i])[0]
+            self.assertEqual(paired[i].tolist(), row.tolist())
+        self.assertTrue(np.array_equal(obs['raster'][idxs], paired.reshape(-1, 5, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from .context import hiseek_dir, coord, gamemap
+
+import os
+import unittest
+
+
+class LineOfSightTestSuite(unittest.TestCase):
+    """Line of sight checks through the edge grid."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(hiseek_dir)
+        self.polygon_map = gamemap.PolygonMap(5, 'grid')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_viewer_on_border(self):
+        for start, end in [((0, 300), (20, 300)), ((0, 0), (10, 10)), ((20, 0), (40, 5))]:
+            self.assertTrue(self.polygon_map.line_of_sight(coord.Coord(*start), coord.Coord(*end)))
+            self.assertTrue(self.polygon_map.line_of_sight(coord.Coord(*end), coord.Coord(*start)))
+        matrix = self.polygon_map.get_fields_of_view_matrix([coord.Coord(0, 300)], [0], 45, [coord.Coord(20, 300), coord.Coord(20, 290)])
+        self.assertEqual(matrix.tolist(), [[True, True]])
+
+    def test_blocked(self):
+        # Across the obstacle spanning x from 450 to 750
+        self.assertFalse(self.polygon_map.line_of_sight(coord.Coord(440, 300), coord.Coord(760, 300)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from .context import hiseek_dir, ucb
+
+import os
+import unittest
+
+try:
+    import config
+    import simulator
+except ImportError:
+    # pyglet, pomegranate, ompl and cvxpy are needed by the simulator
+    simulator = None
+
+
+class SeedingTestSuite(unittest.TestCase):
+    """Runs with the same seed are identical."""
+
+    def test_ucb(self):
+        choices = []
+        for run in range(2):
+            bandit = ucb.UCB(8, seed=5)
+            choices.append([int(bandit.select_action()) for i in range(50)])
+        self.assertEqual(choices[0], choices[1])
+
+    @unittest.skipIf(simulator is None, 'the simulator dependencies are not installed')
+    def test_simulator(self):
+        cwd = os.getcwd()
+        os.chdir(hiseek_dir)
+        try:
+            conf_options = config.Configuration(60, 600, True, 10, 45, 0, False, 'dark_hider.png', 'dark_seeker.png', False, False, False, False, percept_mode='analytic')
+            outcomes = []
+            for run in range(2):
+                total_step_times = []
+                sim = simulator.Simulator('random', 'random', 2, 2, 5, None, None, conf_options, False, False, total_step_times, run, max_steps=200, seed=11)
+                sim.simulate()
+                positions = [(mover.get_current_coordinate().get_x(), mover.get_current_coordinate().get_y()) for mover in sim.get_active_movers()]
+                outcomes.append((total_step_times[-1], positions))
+            self.assertEqual(outcomes[0], outcomes[1])
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from .context import coord, shapes
+
+import math
+import unittest
+
+import numpy as np
+
+
+class VisibilityPolygonTestSuite(unittest.TestCase):
+    """Star test of the visibility polygons."""
+
+    def setUp(self):
+        # Two rays on either side of angle 0 hit points which both truncate
+        # to [460, 449], leaving a zero-length edge in the integer polygon
+        origin_x = 450.5
+        origin_y = 449.5
+        self.ray_angles = [-0.3, -0.02, 0.02, 0.3]
+        star_points = [origin_x, origin_y]
+        for angle in self.ray_angles:
+            star_points += [origin_x + 10 * math.cos(angle), origin_y - 10 * math.sin(angle)]
+        self.star_points = np.array(star_points)
+        self.points = self.star_points.astype(int)
+        self.inside = coord.Coord(455, 449.5)
+        self.outside = coord.Coord(470, 449.5)
+
+    def test_collapsed_vertices(self):
+        self.assertEqual(self.points[4:6].tolist(), self.points[6:8].tolist())
+        polygon = shapes.VisibilityPolygon(self.points, self.ray_angles, self.star_points)
+        self.assertTrue(polygon.is_point_inside(self.inside))
+        self.assertFalse(polygon.is_point_inside(self.outside))
+
+    def test_collapsed_vertices_without_star_points(self):
+        for ray_angles in (self.ray_angles, None):
+            polygon = shapes.VisibilityPolygon(self.points, ray_angles)
+            self.assertEqual(len(polygon.get_ray_angles()), 3)
+            self.assertTrue(polygon.is_point_inside(self.inside))
+            self.assertFalse(polygon.is_point_inside(self.outside))
+
+    def test_visibility_matrix(self):
+        polygons = [shapes.VisibilityPolygon(self.points, self.ray_angles, self.star_points), shapes.VisibilityPolygon(self.points)]
+        xs = np.array([self.inside.get_x(), self.outside.get_x(), 452.0, 450.0])
+        ys = np.array([self.inside.get_y(), self.outside.get_y(), 440.0, 449.0])
+        matrix = shapes.VisibilityPolygon.get_visibility_matrix(polygons, xs, ys)
+        for i, polygon in enumerate(polygons):
+            for j in range(xs.shape[0]):
+                self.assertEqual(matrix[i, j], polygon.is_point_inside(coord.Coord(xs[j], ys[j])))
+        self.assertEqual(matrix[:, 0].tolist(), [True, True])
+        self.assertEqual(matrix[:, 1].tolist(), [False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()